@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/1.9/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE_CLASSES = [
+    'exams.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,6 +81,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # 동시성 테스트는 여러 스레드가 같은 DB를 써야 하므로 메모리 DB 대신 파일을 쓴다
+        'TEST': {'NAME': os.path.join(tempfile.gettempdir(), 'gengoz-test.sqlite3')},
     }
 }
 
@@ -121,21 +125,79 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
-"""
+
+# Authentication
+# 학습 화면은 로그인한 계정에 연결된 exams.User로 동작한다
+
+LOGIN_REDIRECT_URL = 'index'
+
+
+# Statistics counters
+# 0 writes every answer through; a positive value buffers increments per process for that many seconds.
+
+STATISTICS_FLUSH_INTERVAL = 0
+
+
+# SQLite
+# WAL lets readers keep going while a write commits; synchronous=NORMAL is safe under WAL and only risks
+# the last commits on power loss. busy_timeout is in milliseconds.
+
+SQLITE_PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 5000),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', -16000),
+]
+
+# Grade answers from one writer thread per process, committing whatever queued up meanwhile in one transaction.
+SQLITE_WRITE_QUEUE = True
+
+
+# Metrics
+# Wall time, query count and SQL time per view, kept per process. /exams/metrics serves them to staff.
+# A request that runs the same SQL more than METRICS_REPEAT_THRESHOLD times is flagged as N+1.
+# Behind a proxy every client arrives from 127.0.0.1, so INTERNAL_IPS is only trusted with METRICS_ALLOW_INTERNAL_IPS.
+
+METRICS_ENABLED = True
+
+METRICS_REPEAT_THRESHOLD = 10
+
+METRICS_ALLOW_INTERNAL_IPS = False
+
+INTERNAL_IPS = ['127.0.0.1', '::1']
+
+
+# Logging
+# metrics.log gets one JSON line per request and rolls over at 10MB. Flagged N+1 requests also go to the console.
+# Set 'django.db.backends' to DEBUG with DEBUG = True to print every query.
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'message': {
+            'format': '%(message)s',
+        },
+    },
     'handlers': {
         'console': {
-            'level': 'DEBUG',
+            'level': 'WARNING',
             'class': 'logging.StreamHandler',
-        }
+        },
+        'metrics_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.path.join(BASE_DIR, 'metrics.log'),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'message',
+        },
     },
     'loggers': {
-        'django.db.backends': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
+        'exams.metrics': {
+            'handlers': ['metrics_file', 'console'],
+            'level': 'INFO',
+            'propagate': False,
         },
-    }
+    },
 }
-"""
@@ -19,4 +19,5 @@ from django.contrib import admin
 urlpatterns = [
     url(r'^exams/', include('exams.urls')),
     url(r'^admin/', admin.site.urls),
+    url(r'^accounts/', include('django.contrib.auth.urls')),
 ]
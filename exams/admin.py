@@ -1,10 +1,29 @@
-from datetime import datetime
+import io
+from datetime import datetime, timedelta
 
-from django.contrib import admin
+from django import forms
+from django.conf.urls import url
+from django.contrib import admin, messages
+from django.core.urlresolvers import reverse
+from django.db import transaction
+from django.db.models import Prefetch
 from django.forms import ModelForm
+from django.http import HttpRequest, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import redirect, render
 from django.utils import timezone
 
+from exams.changelist import KeysetPaginationMixin, StepListFilter
+from exams.counters import record_steps
+from exams.duecount import get_memory_key, rebuild_counters, record_moves
+from exams.forecast import FORECAST_DAYS, forecast
+from exams.importer import get_format, import_words
 from exams.models import Book, Word, Memory, User, Statistics
+from exams.scheduler import get_scheduler, shift, spread_due
+from exams.search import search_words
+
+SPREAD_DAYS = 7
+SPREAD_CAP = 100
+AUTOCOMPLETE_PAGE_SIZE = 20
 
 
 def localTime(datetime: datetime):
@@ -19,29 +38,88 @@ class WordAdmin(admin.ModelAdmin):
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
-    list_display = ('id', 'owner', 'title', 'create_dt')
+    list_display = ('id', 'owner', 'title', 'scheduler', 'create_dt')
     list_display_links = ('title', )
     ordering = ['-create_dt']
     list_select_related = ('owner', )
+    exclude = ('has_pending_words', )
+    actions = ['reschedule']
+    change_list_template = 'admin/exams/book/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            url(r'^forecast/$', self.admin_site.admin_view(self.forecast_view), name='exams_book_forecast'),
+        ]
+        return urls + super().get_urls()
+
+    def forecast_view(self, request: HttpRequest) -> HttpResponse:
+        form = ForecastForm(request.GET or None)
+        context = dict(self.admin_site.each_context(request), opts=self.model._meta, form=form,
+                       title='Due forecast')
+
+        if form.is_valid():
+            user = form.cleaned_data['user']
+            books = form.cleaned_data['books'] or Book.objects.filter(memory__user=user).distinct()
+            try:
+                dates, results = forecast(user, list(books), form.cleaned_data['days'],
+                                          form.cleaned_data['new_per_day'])
+            except RuntimeError as e:
+                self.message_user(request, str(e), messages.ERROR)
+            else:
+                context['columns'] = ['%s / %s' % (book.title, exam_type) for book, exam_type, _ in results]
+                context['rows'] = [(date, [counts[day] for _, _, counts in results]) for day, date in enumerate(dates)]
+
+        return render(request, 'admin/exams/book/forecast.html', context)
+
+    def reschedule(self, request, queryset):
+        updated = 0
+        for book in queryset:
+            with transaction.atomic():
+                updated += get_scheduler(book).reschedule(book.memory_set.all())
+                rebuild_counters(book_id=book.pk)
+        self.message_user(request, '%d memories rescheduled.' % updated)
+    reschedule.short_description = 'Reschedule memories with the book scheduler'
+
+
+class WordAutocompleteWidget(forms.SelectMultiple):
+    class Media:
+        js = ('admin/js/vendor/jquery/jquery.js', 'admin/js/jquery.init.js', 'exams/js/word_autocomplete.js')
+
+    def render(self, name, value, attrs=None):
+        # 책 전체가 아니라 선택된 단어만 option으로 그리고 나머지는 검색해서 추가한다
+        self.choices = [(word.pk, str(word)) for word in Word.objects.filter(pk__in=value or [])]
+        attrs = dict(attrs or {}, **{'class': 'word-autocomplete',
+                                     'data-url': reverse('admin:exams_word_autocomplete')})
+        return super().render(name, value, attrs)
+
+
+def get_latest_book_id() -> int:
+    # 마지막으로 추가된 단어의 책. pk 순서라서 색인만 읽는다
+    book_id = Word.objects.order_by('-pk').values_list('book_id', flat=True).first()
+    return book_id or Book.objects.order_by('-pk').values_list('pk', flat=True).first()
 
 
 class WordModelForm(ModelForm):
     class Meta:
         model = Word
         exclude = ('create_dt', 'modify_dt')
+        widgets = dict((field, WordAutocompleteWidget()) for field in ('related', 'synonym', 'antonym'))
 
     def __init__(self, *args, **kwargs):
         instance = kwargs.get('instance', None)
 
         if instance:
-            book = instance.book
+            book_id = instance.book_id
         else:
-            book = Word.objects.order_by('-create_dt')[0].book
-            kwargs['initial'] = {'book': book}
+            kwargs['initial'] = kwargs.get('initial') or {}
+            book_id = kwargs['initial'].setdefault('book', get_latest_book_id())
 
         ModelForm.__init__(self, *args, **kwargs)
 
-        queryset = Word.objects.filter(book=book)
+        if self.is_bound and self.data.get('book', '').isdigit():
+            book_id = int(self.data['book'])
+
+        queryset = Word.objects.filter(book_id=book_id)
         if instance:
             queryset = queryset.exclude(pk=instance.pk)
 
@@ -50,18 +128,88 @@ class WordModelForm(ModelForm):
         self.fields['antonym'].queryset = queryset
 
 
+class ForecastForm(forms.Form):
+    user = forms.ModelChoiceField(queryset=User.objects.order_by('name'))
+    books = forms.ModelMultipleChoiceField(queryset=Book.objects.order_by('-create_dt'), required=False,
+                                           help_text='All books of the user when empty.')
+    days = forms.IntegerField(min_value=1, max_value=365, initial=FORECAST_DAYS)
+    new_per_day = forms.IntegerField(min_value=0, initial=0, label='New words per day')
+
+
+class ImportWordsForm(forms.Form):
+    book = forms.ModelChoiceField(queryset=Book.objects.order_by('-create_dt'))
+    file = forms.FileField(help_text='CSV, TSV or JSONL with word, pronunciation, meaning, naver_link, '
+                                     'related, synonym and antonym columns. Terms are separated by ";".')
+
+
 @admin.register(Word)
 class WordAdmin(admin.ModelAdmin):
     list_display = ('id', 'book', 'word', 'meaning', 'related_terms', 'naver_link', 'created_at')
     list_display_links = ('word', )
     list_filter = ('book', )
-    filter_horizontal = ('related', 'synonym', 'antonym')
     ordering = ['-create_dt']
     preserve_filters = True
     search_fields = ('word', 'pronunciation', 'meaning')
     list_select_related = ('book', )
     save_on_top = True
     form = WordModelForm
+    change_list_template = 'admin/exams/word/change_list.html'
+
+    def get_queryset(self, request: HttpRequest):
+        # 목록 한 페이지의 관련어를 관계마다 쿼리 한번으로 읽는다
+        terms = Word.objects.only('word')
+        return super().get_queryset(request).prefetch_related(
+            *[Prefetch(field, queryset=terms) for field in ('related', 'synonym', 'antonym')])
+
+    def get_search_results(self, request: HttpRequest, queryset, search_term: str):
+        return search_words(queryset, search_term), False
+
+    def get_urls(self):
+        urls = [
+            url(r'^import/$', self.admin_site.admin_view(self.import_view), name='exams_word_import'),
+            url(r'^autocomplete/$', self.admin_site.admin_view(self.autocomplete_view),
+                name='exams_word_autocomplete'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request: HttpRequest) -> HttpResponse:
+        form = ImportWordsForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            uploaded = form.cleaned_data['file']
+            try:
+                fmt = get_format(uploaded.name)
+            except ValueError as e:
+                form.add_error('file', str(e))
+            else:
+                stats = import_words(form.cleaned_data['book'],
+                                     io.TextIOWrapper(uploaded.file, encoding='utf-8-sig', newline=''), fmt)
+                self.message_user(request, '%(created)d created, %(updated)d updated, %(linked)d relations linked, '
+                                           '%(missing_terms)d unknown terms.' % stats)
+                return redirect('admin:exams_word_changelist')
+
+        context = dict(self.admin_site.each_context(request), opts=self.model._meta, form=form,
+                       title='Import words')
+        return render(request, 'admin/exams/word/import.html', context)
+
+    def autocomplete_view(self, request: HttpRequest) -> HttpResponse:
+        try:
+            book_id = int(request.GET['book'])
+            after = int(request.GET.get('after', 0))
+            exclude = int(request.GET.get('exclude', 0))
+        except (KeyError, ValueError):
+            return HttpResponseBadRequest('Invalid autocomplete parameters.')
+
+        # (book, pk) 순서로 끊어 읽어서 책 크기와 상관없이 한 페이지만 읽는다
+        words = search_words(Word.objects.filter(book_id=book_id, pk__gt=after).exclude(pk=exclude),
+                             request.GET.get('q', ''))
+        words = list(words.order_by('pk')[:AUTOCOMPLETE_PAGE_SIZE + 1])
+        has_next = len(words) > AUTOCOMPLETE_PAGE_SIZE
+        words = words[:AUTOCOMPLETE_PAGE_SIZE]
+
+        return JsonResponse({
+            'results': [{'id': word.pk, 'text': str(word)} for word in words],
+            'next': words[-1].pk if has_next else None,
+        })
 
     @staticmethod
     def related_terms(obj: Word) -> str:
@@ -83,14 +231,52 @@ class WordAdmin(admin.ModelAdmin):
 
 
 @admin.register(Memory)
-class MemoryAdmin(admin.ModelAdmin):
+class MemoryAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = ('id', 'user', 'book', 'word_title', 'type', 'step', 'unlocked_at', 'status',
                     'group_level', 'aware_cnt', 'forgot_cnt', 'modified_at')
     list_display_links = ('id', )
-    list_filter = ('user', 'book', 'type', 'step', 'status')
+    list_filter = ('user', 'book', 'type', StepListFilter, 'status')
     ordering = ['-modify_dt']
     preserve_filters = True
     list_select_related = ('user', 'book', 'word')
+    actions = ['spread_due_over_week', 'postpone_one_day']
+
+    def save_model(self, request, obj: Memory, form, change: bool):
+        # 고친 unlock_dt와 step을 남은 카드 수와 step 카운터에 반영한다. 학습자, 책, 종류를 바꿔도 맞는다
+        old = Memory.objects.filter(pk=obj.pk).first() if change else None
+        super().save_model(request, obj, form, change)
+        moves = [(get_memory_key(obj), None, obj.unlock_dt)]
+        steps = [(get_memory_key(obj), None, obj.step)]
+        if old is not None:
+            moves.append((get_memory_key(old), old.unlock_dt, None))
+            steps.append((get_memory_key(old), old.step, None))
+        record_moves(moves)
+        record_steps(steps)
+
+    @staticmethod
+    def __rebuild_counters(queryset):
+        for user_id, book_id in queryset.values_list('user_id', 'book_id').distinct().order_by():
+            rebuild_counters(user_id=user_id, book_id=book_id)
+
+    def spread_due_over_week(self, request, queryset):
+        try:
+            moved, left = spread_due(queryset, timezone.now(), SPREAD_DAYS, SPREAD_CAP)
+        except ValueError as e:
+            self.message_user(request, str(e), messages.ERROR)
+            return
+        self.__rebuild_counters(queryset)
+        self.message_user(request, '%d due cards spread over the next %d days.' % (moved, SPREAD_DAYS))
+        if left:
+            self.message_user(request, '%d due cards did not fit in %d days at %d a day and are still due.'
+                              % (left, SPREAD_DAYS, SPREAD_CAP), messages.WARNING)
+    spread_due_over_week.short_description = 'Spread due cards over %d days (at most %d a day)' \
+        % (SPREAD_DAYS, SPREAD_CAP)
+
+    def postpone_one_day(self, request, queryset):
+        shifted = shift(queryset, timedelta(days=1))
+        self.__rebuild_counters(queryset)
+        self.message_user(request, '%d cards postponed.' % shifted)
+    postpone_one_day.short_description = 'Postpone selected cards by one day'
 
     @staticmethod
     def word_title(obj: Memory) -> str:
@@ -109,10 +295,11 @@ class MemoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Statistics)
-class StatisticsAdmin(admin.ModelAdmin):
+class StatisticsAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = ('id', 'user', 'book', 'exam_date', 'type', 'step', 'status', 'aware_cnt', 'forgot_cnt')
     list_display_links = ('id', )
-    list_filter = ('user', 'book', 'type', 'step', 'status')
+    list_filter = ('user', 'book', 'type', StepListFilter, 'status')
+    # (user, book, exam_date DESC, type, step, status) 인덱스 순서
     ordering = ['user', 'book', '-exam_date', 'type', 'step', 'status']
     preserve_filters = True
     list_select_related = ('user', 'book')
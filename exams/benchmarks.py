@@ -0,0 +1,242 @@
+import random
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from exams.deck import get_random_memory, get_remain_count
+from exams.forecast import forecast
+from exams.grading import grade_aware, grade_memory
+from exams.models import Book, Memory, MemoryStatus, MemoryTypes, User, Word
+from exams.search import index_book, search_words
+from exams.sync import sync_memories
+
+SEED_BATCH_SIZE = 500
+
+
+def seed_user(name: str) -> User:
+    return User.objects.create(name=name)
+
+
+def seed_book(owner: User, title: str, word_count: int) -> Book:
+    book = Book.objects.create(title=title, owner=owner)
+    for offset in range(0, word_count, SEED_BATCH_SIZE):
+        Word.objects.bulk_create([
+            Word(book=book, word='%s-%d' % (title, i), meaning='meaning-%d' % i)
+            for i in range(offset, min(offset + SEED_BATCH_SIZE, word_count))
+        ])
+    return book
+
+
+def bench_sync(sizes: list) -> list:
+    user = seed_user('bench-sync')
+    results = []
+    for size in sizes:
+        book = seed_book(user, 'bench-sync-%d' % size, size)
+
+        started = time.perf_counter()
+        created = sync_memories(user, book, MemoryTypes.Word)
+        first_sync = time.perf_counter() - started
+
+        # 이미 동기화된 상태에서 다시 호출하는 비용
+        started = time.perf_counter()
+        sync_memories(user, book, MemoryTypes.Word)
+        steady_sync = time.perf_counter() - started
+
+        results.append({
+            'words': size,
+            'created': created,
+            'first_sync_ms': round(first_sync * 1000, 2),
+            'steady_sync_ms': round(steady_sync * 1000, 2),
+        })
+    return results
+
+
+def percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+        'p95_ms': round(samples[min(len(samples) - 1, len(samples) * 95 // 100)] * 1000, 3),
+        'p99_ms': round(samples[min(len(samples) - 1, len(samples) * 99 // 100)] * 1000, 3),
+    }
+
+
+def measure(func, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def seed_due_memories(user: User, book: Book, exam_type: str, levels: int = 3):
+    sync_memories(user, book, exam_type)
+    # 학습 중인 상태처럼 group_level을 섞는다
+    Memory.objects.filter(user=user, book=book, type=exam_type).update(group_level=F('id') % levels)
+
+
+def bench_select(sizes: list, repeat: int = 200) -> list:
+    user = seed_user('bench-select')
+    results = []
+    for size in sizes:
+        book = seed_book(user, 'bench-select-%d' % size, size)
+        seed_due_memories(user, book, MemoryTypes.Word)
+
+        def order_by_random():
+            memories = Memory.objects.filter(user=user, book=book, type=MemoryTypes.Word,
+                                             unlock_dt__lte=timezone.now()).order_by('group_level', '?')[:1]
+            return memories[0]
+
+        results.append({
+            'memories': size,
+            'order_by_random': measure(order_by_random, repeat),
+            'due_queue_sampler': measure(lambda: get_random_memory(user, book, MemoryTypes.Word), repeat),
+        })
+    return results
+
+
+KANA = 'あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん'
+
+
+def get_kana_word(i: int) -> str:
+    result = []
+    while True:
+        i, digit = divmod(i, len(KANA))
+        result.append(KANA[digit])
+        if not i:
+            return ''.join(result)
+
+
+def seed_kana_book(owner: User, title: str, word_count: int) -> Book:
+    book = Book.objects.create(title=title, owner=owner)
+    for offset in range(0, word_count, SEED_BATCH_SIZE):
+        Word.objects.bulk_create([
+            Word(book=book, word='%s-%d' % (title, i), pronunciation=get_kana_word(i), meaning='meaning-%d' % i)
+            for i in range(offset, min(offset + SEED_BATCH_SIZE, word_count))
+        ])
+    return book
+
+
+def bench_search(sizes: list, repeat: int = 50) -> list:
+    user = seed_user('bench-search')
+    results = []
+    for size in sizes:
+        book = seed_kana_book(user, 'bench-search-%d' % size, size)
+
+        started = time.perf_counter()
+        index_book(book)
+        index_time = time.perf_counter() - started
+
+        result = {'words': size, 'index_ms': round(index_time * 1000, 2)}
+        # 가타카나, 로마자, 색인을 타지 않는 두 글자 검색어
+        for query in ('カキク', 'kakiku', 'かき'):
+            def icontains():
+                return list(Word.objects.filter(Q(word__icontains=query) | Q(pronunciation__icontains=query) |
+                                                Q(meaning__icontains=query)).values_list('pk')[:20])
+
+            def search_index():
+                return list(search_words(Word.objects.all(), query).values_list('pk')[:20])
+
+            result[query] = {'icontains': measure(icontains, repeat), 'search_index': measure(search_index, repeat)}
+        results.append(result)
+    return results
+
+
+def bench_forecast(sizes: list, repeat: int = 5) -> list:
+    user = seed_user('bench-forecast')
+    now = timezone.now()
+    results = []
+    for size in sizes:
+        book = seed_book(user, 'bench-forecast-%d' % size, size)
+        sync_memories(user, book, MemoryTypes.Word)
+
+        # 앞으로 90일에 고르게 풀리고 step이 섞인 상태로 만든다
+        memories = Memory.objects.filter(user=user, book=book)
+        first_pk = memories.order_by('pk').values_list('pk', flat=True)[0]
+        for day in range(90):
+            memories.filter(pk__gte=first_pk + size * day // 90, pk__lt=first_pk + size * (day + 1) // 90) \
+                    .update(unlock_dt=now + timedelta(days=day), step=day % 4)
+
+        results.append({
+            'memories': size,
+            'forecast': measure(lambda: forecast(user, [book], now=now), repeat),
+            'forecast_with_new_words': measure(lambda: forecast(user, [book], new_per_day=50, now=now), repeat),
+        })
+    return results
+
+
+def bench_users(sizes: list, words: int = 2000, repeat: int = 200) -> list:
+    # 같은 책을 공부하는 학습자 수를 늘려가며 한 요청의 시간을 잰다
+    book = seed_book(seed_user('bench-users-owner'), 'bench-users', words)
+    users = []
+    results = []
+    for size in sizes:
+        while len(users) < size:
+            user = seed_user('bench-users-%d' % len(users))
+            seed_due_memories(user, book, MemoryTypes.Word)
+            users.append(user)
+
+        def answer():
+            user = random.choice(users)
+            memory = get_random_memory(user, book, MemoryTypes.Word)
+            get_remain_count(user, book, MemoryTypes.Word)
+            grade_aware(memory)
+
+        results.append({
+            'users': size,
+            'memories': size * words,
+            'answer': measure(answer, repeat),
+        })
+    return results
+
+
+def get_storage_sizes(model) -> dict:
+    # SQLite dbstat로 테이블과 인덱스마다 차지하는 페이지 크기(MB)를 잰다
+    table = model._meta.db_table
+    sizes = {}
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s", [table])
+        for name, in cursor.fetchall():
+            cursor.execute('PRAGMA index_info(%s)' % connection.ops.quote_name(name))
+            columns = ','.join(column for _, _, column in cursor.fetchall())
+            cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [name])
+            sizes[columns] = round(cursor.fetchone()[0] / 2 ** 20, 2)
+        cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [table])
+        sizes['table'] = round(cursor.fetchone()[0] / 2 ** 20, 2)
+    return sizes
+
+
+def bench_schedule(sizes: list, repeat: int = 500) -> list:
+    user = seed_user('bench-schedule')
+    results = []
+    for size in sizes:
+        book = seed_book(user, 'bench-schedule-%d' % size, size)
+        seed_due_memories(user, book, MemoryTypes.Word)
+        memory_ids = list(Memory.objects.filter(user=user, book=book).values_list('pk', flat=True))
+
+        def grade():
+            grade_memory(random.choice(memory_ids), random.choice((MemoryStatus.Aware, MemoryStatus.Forgot)))
+
+        storage = get_storage_sizes(Memory)
+        results.append({
+            'memories': size,
+            'due_pick': measure(lambda: get_random_memory(user, book, MemoryTypes.Word), repeat),
+            'grade': measure(grade, repeat),
+            'table_mb': storage.pop('table'),
+            'indexes_mb': round(sum(storage.values()), 2),
+            'index_mb': storage,
+        })
+    return results
+
+
+BENCHMARKS = {
+    'sync': bench_sync,
+    'select': bench_select,
+    'search': bench_search,
+    'forecast': bench_forecast,
+    'users': bench_users,
+    'schedule': bench_schedule,
+}
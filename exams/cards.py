@@ -0,0 +1,62 @@
+from django.db.models import Case, Prefetch, TextField, Value, When
+
+from exams.models import Book, Word
+
+CARD_BATCH_SIZE = 200
+
+RELATION_FIELDS = ('related', 'synonym', 'antonym')
+
+
+def render_related_terms(word: Word) -> str:
+    result = [word.string_with_link()]
+    for label, terms in (('관', word.related_words), ('유', word.synonym_words), ('반', word.antonym_words)):
+        if terms:
+            result.append('[%s] %s' % (label, ' '.join([term.string_with_link() for term in terms])))
+    return ' / '.join(result)
+
+
+def get_neighbor_ids(word_ids: list) -> set:
+    # 관련어 줄에 이 단어들이 나오는 단어들
+    neighbor_ids = set()
+    for field in RELATION_FIELDS:
+        neighbor_ids.update(getattr(Word, field).through.objects.filter(from_word_id__in=word_ids)
+                                                               .values_list('to_word_id', flat=True))
+    return neighbor_ids
+
+
+def rebuild_cards(word_ids) -> int:
+    word_ids = list(word_ids)
+    for offset in range(0, len(word_ids), CARD_BATCH_SIZE):
+        words = Word.objects.filter(pk__in=word_ids[offset:offset + CARD_BATCH_SIZE]) \
+                            .prefetch_related(Prefetch('related', to_attr='related_words'),
+                                              Prefetch('synonym', to_attr='synonym_words'),
+                                              Prefetch('antonym', to_attr='antonym_words'))
+        card_htmls = dict((word.pk, render_related_terms(word)) for word in words)
+        if card_htmls:
+            Word.objects.filter(pk__in=card_htmls.keys()).update(card_html=Case(
+                *[When(pk=pk, then=Value(card_html)) for pk, card_html in card_htmls.items()],
+                output_field=TextField()))
+    return len(word_ids)
+
+
+def rebuild_book_cards(book: Book) -> int:
+    # pk 순서로 끊어서 책 전체를 다시 만든다
+    rebuilt = 0
+    last_pk = 0
+    while True:
+        word_ids = list(book.word_set.filter(pk__gt=last_pk).order_by('pk')
+                                     .values_list('pk', flat=True)[:CARD_BATCH_SIZE])
+        if not word_ids:
+            return rebuilt
+        rebuilt += rebuild_cards(word_ids)
+        last_pk = word_ids[-1]
+
+
+def get_card_html(word: Word) -> str:
+    if word.card_html:
+        return word.card_html
+
+    # 아직 만들어지지 않았다면 읽기만 해서 그린다. 저장은 signal과 rebuild_cards가 한다
+    for field in RELATION_FIELDS:
+        setattr(word, '%s_words' % field, list(getattr(word, field).all()))
+    return render_related_terms(word)
@@ -0,0 +1,177 @@
+import hashlib
+
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList, SEARCH_VAR
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connection
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+from exams.models import StepCounter
+
+# 이 행 다음부터 보여준다
+AFTER_VAR = 'after'
+
+# 필터를 걸었을 때 이만큼까지만 센다
+COUNT_LIMIT = 10000
+COUNT_CACHE_SECONDS = 60
+
+
+def get_table_estimate(model) -> int:
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row else 0
+    # 지운 행이 거의 없으므로 가장 큰 id가 행 수에 가깝다. SQLite는 rowid B-tree의 끝만 읽는다
+    return model._default_manager.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+
+def get_capped_count(queryset, cache_key: str) -> int:
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.order_by()[:COUNT_LIMIT + 1].count()
+        cache.set(cache_key, count, COUNT_CACHE_SECONDS)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    def __init__(self, object_list, per_page, count: int, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.estimated_count = count
+
+    @cached_property
+    def count(self):
+        return self.estimated_count
+
+
+def get_seek_columns(queryset) -> list:
+    # 정렬 열마다 (필드, 내림차순 여부). 관계를 건너가는 정렬이면 keyset으로 찾을 수 없다
+    ordering = queryset.query.order_by
+    if not ordering:
+        return None
+    opts = queryset.model._meta
+    columns = []
+    for name in ordering:
+        try:
+            field = opts.pk if name.lstrip('-') == 'pk' else opts.get_field(name.lstrip('-'))
+        except FieldDoesNotExist:
+            return None
+        if field.is_relation and not field.many_to_one:
+            return None
+        columns.append((field, name.startswith('-')))
+    return columns
+
+
+def seek(queryset, columns: list, after_pk: int):
+    fields = [field for field, _ in columns]
+    values = queryset.model._default_manager.filter(pk=after_pk).values_list(*[field.attname for field in fields])
+    values = values.first()
+    if values is None:
+        # 그 사이 지워진 행이면 처음부터 보여준다
+        return queryset
+
+    quote = connection.ops.quote_name
+    names = ['%s.%s' % (quote(queryset.model._meta.db_table), quote(field.column)) for field in fields]
+    params = [field.get_db_prep_value(value, connection) for field, value in zip(fields, values)]
+    operators = ['<' if descending else '>' for _, descending in columns]
+    if len(set(operators)) == 1:
+        # 정렬 방향이 모두 같으면 (a, b, ...) < (?, ?, ...) 한번으로 찾는다
+        placeholders = ', '.join(['%s'] * len(names))
+        return queryset.extra(where=['(%s) %s (%s)' % (', '.join(names), operators[0], placeholders)], params=params)
+
+    # 방향이 섞이면 (a < ?) OR (a = ? AND b > ?) OR ... 로 푼다.
+    # 첫 열의 범위를 따로 걸어야 인덱스를 커서가 있는 첫 열 값부터 읽는다
+    terms = []
+    term_params = []
+    for i, (name, operator) in enumerate(zip(names, operators)):
+        terms.append(' AND '.join(['%s = %%s' % equal for equal in names[:i]] + ['%s %s %%s' % (name, operator)]))
+        term_params += params[:i + 1]
+    return queryset.extra(
+        where=['%s %s= %%s' % (names[0], operators[0]), ' OR '.join('(%s)' % term for term in terms)],
+        params=[params[0]] + term_params)
+
+
+class KeysetChangeList(ChangeList):
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # 필터나 정렬을 바꾸면 첫 페이지로 돌아간다
+        return super().get_query_string(new_params, (remove or []) + [AFTER_VAR])
+
+    def get_next_query_string(self) -> str:
+        return super().get_query_string({AFTER_VAR: self.next_after})
+
+    def get_results(self, request):
+        columns = get_seek_columns(self.queryset)
+        self.keyset = columns is not None
+        filtered = bool(self.get_filters_params() or self.params.get(SEARCH_VAR))
+        if filtered or not self.keyset:
+            # OFFSET으로 넘길 때는 빈 페이지 링크가 생기지 않도록 실제 행 수를 센다
+            filters = repr((sorted(self.get_filters_params().items()), self.query)).encode('utf-8')
+            cache_key = 'admin-count:%s:%s' % (self.opts.label_lower, hashlib.md5(filters).hexdigest())
+            result_count = get_capped_count(self.queryset, cache_key)
+            self.result_count_label = str(result_count)
+            if result_count > COUNT_LIMIT:
+                self.result_count_label = 'more than %d' % COUNT_LIMIT
+                if not filtered:
+                    result_count = max(result_count, get_table_estimate(self.model))
+                    self.result_count_label = 'about %d' % result_count
+        else:
+            result_count = get_table_estimate(self.model)
+            self.result_count_label = 'about %d' % result_count
+        paginator = EstimatedCountPaginator(self.queryset, self.list_per_page, result_count)
+
+        after = request.GET.get(AFTER_VAR, '')
+        self.after = int(after) if after.isdigit() else None
+        self.next_after = None
+        if self.keyset:
+            # 몇 번째 페이지든 인덱스에서 바로 찾아가므로 첫 페이지와 비용이 같다
+            queryset = seek(self.queryset, columns, self.after) if self.after else self.queryset
+            result_list = list(queryset[:self.list_per_page])
+            if len(result_list) == self.list_per_page:
+                self.next_after = result_list[-1].pk
+            self.multi_page = bool(self.after or self.next_after)
+        else:
+            try:
+                result_list = paginator.page(self.page_num + 1).object_list
+            except InvalidPage:
+                raise IncorrectLookupParameters
+            self.multi_page = result_count > self.list_per_page
+
+        self.result_count = result_count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.paginator = paginator
+
+
+class KeysetPaginationMixin:
+    change_list_template = 'admin/exams/keyset_change_list.html'
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class StepListFilter(admin.SimpleListFilter):
+    # 전체 테이블에서 DISTINCT step을 구하지 않고 StepCounter에 있는 step만 보여준다
+    title = 'step'
+    parameter_name = 'step'
+
+    def lookups(self, request, model_admin):
+        steps = StepCounter.objects.order_by('step').values_list('step', flat=True).distinct()
+        return [(str(step), str(step)) for step in steps]
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(step=self.value())
+        return queryset
@@ -0,0 +1,192 @@
+import atexit
+import threading
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+
+from exams.models import Memory, ROLLUP_PERIODS, RollupPeriods, Statistics, StatisticsRollup, StepCounter
+
+ROLLUP_BATCH_SIZE = 500
+
+
+def __upsert(model, lookup: dict, **counts):
+    increments = dict((field, F(field) + count) for field, count in counts.items())
+    if model.objects.filter(**lookup).update(**increments):
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**dict(lookup, **counts))
+    except IntegrityError:
+        # 다른 요청이 먼저 만들었다면 그 행에 더한다
+        model.objects.filter(**lookup).update(**increments)
+
+
+def get_period_start(period: str, day: date) -> date:
+    if period == RollupPeriods.Week:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def increase_statistics(aware_counts: Counter, forgot_counts: Counter):
+    rollup_aware_counts = Counter()
+    rollup_forgot_counts = Counter()
+
+    for key in set(aware_counts.keys()) | set(forgot_counts.keys()):
+        user_id, book_id, exam_date, exam_type, step, status = key
+        lookup = dict(user_id=user_id, book_id=book_id, exam_date=exam_date,
+                      type=exam_type, step=step, status=status)
+        __upsert(Statistics, lookup, aware_cnt=aware_counts[key], forgot_cnt=forgot_counts[key])
+
+        # 주별, 월별 합계도 같이 올린다
+        for period, _ in ROLLUP_PERIODS:
+            rollup_key = (user_id, book_id, exam_type, period, get_period_start(period, exam_date), step)
+            rollup_aware_counts[rollup_key] += aware_counts[key]
+            rollup_forgot_counts[rollup_key] += forgot_counts[key]
+
+    for rollup_key in rollup_aware_counts.keys() | rollup_forgot_counts.keys():
+        lookup = dict(zip(('user_id', 'book_id', 'type', 'period', 'start_date', 'step'), rollup_key))
+        __upsert(StatisticsRollup, lookup,
+                 aware_cnt=rollup_aware_counts[rollup_key], forgot_cnt=rollup_forgot_counts[rollup_key])
+
+
+def rebuild_rollups(**filters):
+    aware_counts = Counter()
+    forgot_counts = Counter()
+    for user_id, book_id, exam_type, exam_date, step, aware_cnt, forgot_cnt in \
+            Statistics.objects.filter(**filters).values_list('user_id', 'book_id', 'type', 'exam_date', 'step',
+                                                             'aware_cnt', 'forgot_cnt').iterator():
+        for period, _ in ROLLUP_PERIODS:
+            rollup_key = (user_id, book_id, exam_type, period, get_period_start(period, exam_date), step)
+            aware_counts[rollup_key] += aware_cnt
+            forgot_counts[rollup_key] += forgot_cnt
+
+    with transaction.atomic():
+        StatisticsRollup.objects.filter(**filters).delete()
+        rollup_keys = list(aware_counts.keys())
+        for offset in range(0, len(rollup_keys), ROLLUP_BATCH_SIZE):
+            StatisticsRollup.objects.bulk_create([
+                StatisticsRollup(aware_cnt=aware_counts[rollup_key], forgot_cnt=forgot_counts[rollup_key],
+                                 **dict(zip(('user_id', 'book_id', 'type', 'period', 'start_date', 'step'),
+                                            rollup_key)))
+                for rollup_key in rollup_keys[offset:offset + ROLLUP_BATCH_SIZE]
+            ])
+
+
+def __get_key_lookup(key: tuple) -> dict:
+    user_id, book_id, exam_type = key
+    return dict(user_id=user_id, book_id=book_id, type=exam_type)
+
+
+def rebuild_step_counter(key: tuple) -> dict:
+    lookup = __get_key_lookup(key)
+    with transaction.atomic():
+        StepCounter.objects.filter(**lookup).delete()
+        step_counts = dict(Memory.objects.filter(**lookup).order_by().values_list('step')
+                                         .annotate(Count('pk')))
+        StepCounter.objects.bulk_create([StepCounter(step=step, memory_cnt=memory_cnt, **lookup)
+                                         for step, memory_cnt in step_counts.items()])
+    return step_counts
+
+
+def rebuild_step_counters(**filters) -> int:
+    keys = list(StepCounter.objects.filter(**filters).values_list('user_id', 'book_id', 'type').distinct())
+    for key in keys:
+        rebuild_step_counter(key)
+    return len(keys)
+
+
+def get_step_counts(key: tuple) -> dict:
+    step_counts = dict(StepCounter.objects.filter(**__get_key_lookup(key)).values_list('step', 'memory_cnt'))
+    if not step_counts:
+        # 처음 읽을 때 한번 센다
+        step_counts = rebuild_step_counter(key)
+    return dict((step, memory_cnt) for step, memory_cnt in step_counts.items() if memory_cnt)
+
+
+def record_steps(moves: list):
+    # moves: [((user_id, book_id, type), old step or None, new step or None)]
+    built = {}
+    deltas = Counter()
+
+    for key, old_step, new_step in moves:
+        if key not in built:
+            built[key] = StepCounter.objects.filter(**__get_key_lookup(key)).exists()
+        if not built[key] or old_step == new_step:
+            # 카운터가 없으면 처음 읽을 때 새로 센다
+            continue
+        if old_step is not None:
+            deltas[(key, old_step)] -= 1
+        if new_step is not None:
+            deltas[(key, new_step)] += 1
+
+    for (key, step), delta in deltas.items():
+        if delta:
+            __upsert(StepCounter, dict(step=step, **__get_key_lookup(key)), memory_cnt=delta)
+
+
+class StatisticsAccumulator:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.aware_counts = Counter()
+        self.forgot_counts = Counter()
+        self.timer = None
+
+    def add(self, aware_counts: Counter, forgot_counts: Counter):
+        with self.lock:
+            self.aware_counts.update(aware_counts)
+            self.forgot_counts.update(forgot_counts)
+            if self.timer is None:
+                self.timer = threading.Timer(self.interval, self.flush_in_background)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def flush(self):
+        with self.lock:
+            aware_counts, self.aware_counts = self.aware_counts, Counter()
+            forgot_counts, self.forgot_counts = self.forgot_counts, Counter()
+            self.timer = None
+
+        try:
+            with transaction.atomic():
+                increase_statistics(aware_counts, forgot_counts)
+        except Exception:
+            # 반영하지 못한 숫자는 다음 flush 때 다시 시도한다
+            with self.lock:
+                self.aware_counts.update(aware_counts)
+                self.forgot_counts.update(forgot_counts)
+            raise
+
+
+__accumulator = None
+__accumulator_lock = threading.Lock()
+
+
+def get_accumulator() -> StatisticsAccumulator:
+    global __accumulator
+    with __accumulator_lock:
+        if __accumulator is None:
+            __accumulator = StatisticsAccumulator(settings.STATISTICS_FLUSH_INTERVAL)
+            # 프로세스가 종료될 때 남은 숫자를 모두 기록한다
+            atexit.register(__accumulator.flush)
+        return __accumulator
+
+
+def record_statistics(aware_counts: Counter, forgot_counts: Counter):
+    if not getattr(settings, 'STATISTICS_FLUSH_INTERVAL', 0):
+        increase_statistics(aware_counts, forgot_counts)
+        return
+
+    # 롤백된 채점이 숫자에 섞이지 않도록 커밋된 후에 모은다
+    accumulator = get_accumulator()
+    transaction.on_commit(lambda: accumulator.add(aware_counts, forgot_counts))
@@ -0,0 +1,112 @@
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timedelta
+
+from django.utils import timezone
+
+from exams.counters import get_period_start, get_step_counts
+from exams.duecount import floor_hour, get_due_count
+from exams.models import Book, Memory, RollupPeriods, Statistics, StatisticsRollup, UnlockBucket, User
+from exams.scheduler import get_scheduler
+
+DAILY_DAYS = 14
+WEEKLY_WEEKS = 12
+MONTHLY_MONTHS = 12
+FORECAST_DAYS = 14
+
+
+def get_rate(aware_cnt: int, forgot_cnt: int) -> float:
+    total = aware_cnt + forgot_cnt
+    return round(aware_cnt * 100 / total, 1) if total else None
+
+
+def __build_table(rows: list, steps: list) -> list:
+    # rows: [(기간, step, aware_cnt, forgot_cnt)] -> 기간마다 step별 정답률
+    aware_counts = OrderedDict()
+    forgot_counts = {}
+    for period, step, aware_cnt, forgot_cnt in rows:
+        aware_counts.setdefault(period, Counter())[step] += aware_cnt
+        forgot_counts.setdefault(period, Counter())[step] += forgot_cnt
+
+    table = []
+    for period, aware in aware_counts.items():
+        forgot = forgot_counts[period]
+        table.append({
+            'period': period,
+            'rates': [get_rate(aware[step], forgot[step]) for step in steps],
+            'aware_cnt': sum(aware.values()),
+            'forgot_cnt': sum(forgot.values()),
+            'rate': get_rate(sum(aware.values()), sum(forgot.values())),
+        })
+    return table
+
+
+def get_retention_curve(book: Book, monthly_rows: list) -> list:
+    scheduler = get_scheduler(book)
+    aware_counts = Counter()
+    forgot_counts = Counter()
+    for _, step, aware_cnt, forgot_cnt in monthly_rows:
+        aware_counts[step] += aware_cnt
+        forgot_counts[step] += forgot_cnt
+
+    curve = []
+    for step in sorted(aware_counts.keys() | forgot_counts.keys()):
+        # step에서 본 시험은 바로 앞 step의 간격만큼 쉬고 본 것이다
+        interval = scheduler.get_interval(step - 1, 0) if step > 0 else timedelta(0)
+        curve.append({
+            'step': step,
+            'interval_days': round(interval.total_seconds() / 86400, 1) if interval is not None else None,
+            'answered_cnt': aware_counts[step] + forgot_counts[step],
+            'rate': get_rate(aware_counts[step], forgot_counts[step]),
+        })
+    return curve
+
+
+def get_forecast(key: tuple, now: datetime, today: date) -> list:
+    user_id, book_id, exam_type = key
+    lookup = dict(user_id=user_id, book_id=book_id, type=exam_type)
+    due_counts = Counter()
+    # 지금 풀려 있는 카드와 이번 시간대에 마저 풀릴 카드는 오늘 볼 카드로 센다.
+    # 이번 시간대의 버킷에는 이미 풀린 카드도 들어 있으므로 남은 카드는 직접 센다
+    next_hour = floor_hour(now) + timedelta(hours=1)
+    due_counts[today] = get_due_count(key, now) + \
+        Memory.objects.filter(unlock_dt__gt=now, unlock_dt__lt=next_hour, **lookup).count()
+
+    until = now + timedelta(days=FORECAST_DAYS)
+    for bucket_dt, unlock_cnt in UnlockBucket.objects.filter(bucket_dt__gte=next_hour, bucket_dt__lt=until, **lookup) \
+                                                     .values_list('bucket_dt', 'unlock_cnt'):
+        due_counts[timezone.localtime(bucket_dt).date()] += unlock_cnt
+
+    return [{'date': today + timedelta(days=day), 'due_cnt': due_counts[today + timedelta(days=day)]}
+            for day in range(FORECAST_DAYS)]
+
+
+def get_dashboard(user: User, book: Book, exam_type: str, now: datetime = None) -> dict:
+    now = now or timezone.now()
+    today = timezone.localtime(now).date()
+    key = (user.pk, book.pk, exam_type)
+    lookup = dict(user=user, book=book, type=exam_type)
+
+    daily_rows = list(Statistics.objects.filter(exam_date__gt=today - timedelta(days=DAILY_DAYS), **lookup)
+                                        .order_by('-exam_date')
+                                        .values_list('exam_date', 'step', 'aware_cnt', 'forgot_cnt'))
+    since = get_period_start(RollupPeriods.Week, today) - timedelta(weeks=WEEKLY_WEEKS)
+    weekly_rows = list(StatisticsRollup.objects.filter(period=RollupPeriods.Week, start_date__gt=since, **lookup)
+                                               .order_by('-start_date')
+                                               .values_list('start_date', 'step', 'aware_cnt', 'forgot_cnt'))
+    # 정답률 곡선은 전체 기간을 보므로 행이 가장 적은 월별 합계를 모두 읽는다
+    monthly_rows = list(StatisticsRollup.objects.filter(period=RollupPeriods.Month, **lookup)
+                                                .order_by('-start_date')
+                                                .values_list('start_date', 'step', 'aware_cnt', 'forgot_cnt'))
+
+    step_counts = get_step_counts(key)
+    steps = sorted(set(row[1] for row in daily_rows + weekly_rows + monthly_rows) | step_counts.keys())
+
+    return {
+        'steps': steps,
+        'daily': __build_table(daily_rows, steps),
+        'weekly': __build_table(weekly_rows, steps),
+        'monthly': __build_table(monthly_rows, steps)[:MONTHLY_MONTHS],
+        'retention': get_retention_curve(book, monthly_rows),
+        'step_counts': [{'step': step, 'memory_cnt': step_counts.get(step, 0)} for step in steps],
+        'forecast': get_forecast(key, now, today),
+    }
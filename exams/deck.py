@@ -0,0 +1,75 @@
+import random
+from datetime import datetime
+
+from django.db.models import Count
+from django.utils import timezone
+
+from exams.cards import get_card_html
+from exams.duecount import get_due_count
+from exams.models import Book, Memory, MemoryTypes, User, Word
+
+
+def get_card_queryset(memories):
+    # 관련어는 Word.card_html에 미리 만들어 두었으므로 단어만 join한다
+    return memories.select_related('word')
+
+
+def get_due_memories(user: User, book: Book, exam_type: str, now: datetime = None):
+    return Memory.objects.filter(user=user, book=book, type=exam_type, unlock_dt__lte=now or timezone.now())
+
+
+def get_random_memory(user: User, book: Book, exam_type: str, now: datetime = None) -> Memory:
+    due = get_due_memories(user, book, exam_type, now)
+
+    # (user, book, type, group_level, unlock_dt) 인덱스 순서대로 읽으므로 가장 낮은 group_level만 센다
+    buckets = due.values('group_level').annotate(size=Count('id')).order_by('group_level')[:1]
+    if len(buckets) <= 0:
+        return None
+
+    # 버킷 안에서 임의의 위치를 골라 인덱스만으로 건너뛴다
+    offset = random.randrange(buckets[0]['size'])
+    memory_ids = due.filter(group_level=buckets[0]['group_level']) \
+                    .order_by('unlock_dt').values_list('id', flat=True)[offset:offset + 1]
+    if len(memory_ids) <= 0:
+        return None
+
+    return get_card_queryset(Memory.objects.filter(pk=memory_ids[0]))[0]
+
+
+def get_remain_count(user: User, book: Book, exam_type: str, now: datetime = None) -> int:
+    return get_due_count((user.pk, book.pk, exam_type), now)
+
+
+def get_question_answer(word: Word, exam_type: str) -> tuple:
+    if exam_type == MemoryTypes.Word:
+        return word.word, word.meaning
+    elif exam_type == MemoryTypes.Meaning:
+        return word.meaning, word.word
+    else:
+        raise ValueError('Invalid Exam-Type.')
+
+
+def get_deck(user: User, book: Book, exam_type: str, size: int, now: datetime = None) -> list:
+    due = get_due_memories(user, book, exam_type, now)
+
+    # group_level마다 따로 읽어야 unlock_dt 순서를 인덱스에서 바로 얻는다
+    memories = []
+    for group_level in due.values_list('group_level', flat=True).annotate(Count('id')).order_by('group_level'):
+        memories += get_card_queryset(due.filter(group_level=group_level)).order_by('unlock_dt')[:size - len(memories)]
+        if len(memories) >= size:
+            break
+    random.shuffle(memories)
+
+    cards = []
+    for memory in memories:
+        question, answer = get_question_answer(memory.word, exam_type)
+        cards.append({
+            'id': memory.id,
+            'question': question,
+            'answer': answer,
+            'pronunciation': memory.word.pronunciation,
+            'related_terms': get_card_html(memory.word),
+            'step': memory.step,
+            'group_level': memory.group_level,
+        })
+    return cards
@@ -0,0 +1,144 @@
+from collections import Counter
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from exams.models import DueCounter, Memory, UnlockBucket
+from exams.writer import write
+
+REBUILD_BATCH_SIZE = 2000
+
+
+def floor_hour(dt: datetime) -> datetime:
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def __get_key_lookup(key: tuple) -> dict:
+    user_id, book_id, exam_type = key
+    return dict(user_id=user_id, book_id=book_id, type=exam_type)
+
+
+def rebuild_counter(key: tuple, now: datetime = None) -> DueCounter:
+    count_dt = floor_hour(now or timezone.now())
+    lookup = __get_key_lookup(key)
+    memories = Memory.objects.filter(**lookup)
+
+    with transaction.atomic():
+        DueCounter.objects.filter(**lookup).delete()
+        UnlockBucket.objects.filter(**lookup).delete()
+
+        # 앞으로 풀릴 카드는 한시간 단위로 센다
+        buckets = Counter(floor_hour(unlock_dt) for unlock_dt in memories.filter(unlock_dt__gte=count_dt)
+                                                                        .values_list('unlock_dt', flat=True)
+                                                                        .iterator())
+        bucket_dts = sorted(buckets.keys())
+        for offset in range(0, len(bucket_dts), REBUILD_BATCH_SIZE):
+            UnlockBucket.objects.bulk_create([
+                UnlockBucket(bucket_dt=bucket_dt, unlock_cnt=buckets[bucket_dt], **lookup)
+                for bucket_dt in bucket_dts[offset:offset + REBUILD_BATCH_SIZE]
+            ])
+
+        return DueCounter.objects.create(due_cnt=memories.filter(unlock_dt__lt=count_dt).count(),
+                                         count_dt=count_dt, **lookup)
+
+
+def rebuild_counters(**filters) -> int:
+    keys = list(DueCounter.objects.filter(**filters).values_list('user_id', 'book_id', 'type'))
+    for key in keys:
+        rebuild_counter(key)
+    return len(keys)
+
+
+def __build_counter(key: tuple, now: datetime) -> DueCounter:
+    # 쓰기 잠금을 기다리는 동안 다른 요청이 먼저 만들었을 수 있다
+    return DueCounter.objects.filter(**__get_key_lookup(key)).first() or rebuild_counter(key, now)
+
+
+def get_counter(key: tuple, now: datetime = None) -> DueCounter:
+    counter = DueCounter.objects.filter(**__get_key_lookup(key)).first()
+    if counter is not None:
+        return counter
+    return write(__build_counter, key, now)
+
+
+def __fold_buckets(counter: DueCounter, count_dt: datetime):
+    lookup = __get_key_lookup((counter.user_id, counter.book_id, counter.type))
+
+    with transaction.atomic():
+        # 이미 지나간 시간대의 버킷은 due_cnt로 합친다
+        buckets = list(UnlockBucket.objects.select_for_update()
+                                           .filter(bucket_dt__lt=count_dt, **lookup)
+                                           .values_list('pk', 'unlock_cnt'))
+        folded_cnt = sum(unlock_cnt for _, unlock_cnt in buckets)
+        UnlockBucket.objects.filter(pk__in=[pk for pk, _ in buckets]).delete()
+
+        values = dict(due_cnt=F('due_cnt') + folded_cnt)
+        if counter.count_dt < count_dt:
+            values['count_dt'] = count_dt
+        DueCounter.objects.filter(pk=counter.pk).update(**values)
+
+
+def get_due_count(key: tuple, now: datetime = None) -> int:
+    now = now or timezone.now()
+    count_dt = floor_hour(now)
+    counter = get_counter(key, now)
+
+    if now < counter.count_dt:
+        # 이미 합쳐진 시간대보다 앞선 시각이라면 직접 센다
+        return Memory.objects.filter(unlock_dt__lte=now, **__get_key_lookup(key)).count()
+
+    if counter.count_dt < count_dt or \
+            UnlockBucket.objects.filter(bucket_dt__lt=count_dt, **__get_key_lookup(key)).exists():
+        write(__fold_buckets, counter, count_dt)
+        counter.refresh_from_db()
+
+    # 이번 시간대에 풀린 카드만 직접 센다
+    unlocked_cnt = Memory.objects.filter(unlock_dt__gte=counter.count_dt, unlock_dt__lte=now,
+                                         **__get_key_lookup(key)).count()
+    return counter.due_cnt + unlocked_cnt
+
+
+def __add_to_bucket(key: tuple, bucket_dt: datetime, delta: int):
+    lookup = dict(bucket_dt=bucket_dt, **__get_key_lookup(key))
+    if UnlockBucket.objects.filter(**lookup).update(unlock_cnt=F('unlock_cnt') + delta):
+        return
+
+    try:
+        with transaction.atomic():
+            UnlockBucket.objects.create(unlock_cnt=delta, **lookup)
+    except IntegrityError:
+        UnlockBucket.objects.filter(**lookup).update(unlock_cnt=F('unlock_cnt') + delta)
+
+
+def record_moves(moves: list):
+    # moves: [((user_id, book_id, type), old unlock_dt or None, new unlock_dt or None)]
+    counters = {}
+    deltas = Counter()
+
+    for key, old_dt, new_dt in moves:
+        if key not in counters:
+            counters[key] = DueCounter.objects.filter(**__get_key_lookup(key)).first()
+        counter = counters[key]
+        if counter is None or old_dt == new_dt:
+            # 카운터가 없으면 처음 읽을 때 새로 센다
+            continue
+
+        for dt, delta in ((old_dt, -1), (new_dt, 1)):
+            if dt is None:
+                continue
+            # count_dt 이전은 due_cnt, 이후는 시간대별 버킷에 더한다
+            deltas[(key, floor_hour(dt) if dt >= counter.count_dt else None)] += delta
+
+    for (key, bucket_dt), delta in deltas.items():
+        if delta == 0:
+            continue
+        if bucket_dt is None:
+            DueCounter.objects.filter(pk=counters[key].pk).update(due_cnt=F('due_cnt') + delta)
+        else:
+            __add_to_bucket(key, bucket_dt, delta)
+
+
+def get_memory_key(memory: Memory) -> tuple:
+    return memory.user_id, memory.book_id, memory.type
@@ -0,0 +1,123 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from exams.models import Memory, MemoryTypes, User
+from exams.scheduler import get_scheduler
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FORECAST_DAYS = 90
+
+# 틀린 횟수는 이 이상이면 같은 간격으로 본다
+MAX_LAPSES = 20
+
+DAY_SECONDS = 86400
+
+# 다 외운 카드
+GRADUATED = np.iinfo(np.int64).max // 2 if np else None
+
+
+def __require_numpy():
+    if np is None:
+        raise RuntimeError('Forecasting requires numpy. Install it with "pip install numpy".')
+
+
+def load_schedule(user: User, book_ids: list, midnight: datetime, horizon: int) -> dict:
+    # 기간 안에 풀리는 카드를 (book_id, type, 날짜, step, 틀린 횟수, 재학습 여부)별로 센 배열로 한번에 읽는다
+    __require_numpy()
+    until = midnight + timedelta(days=horizon)
+    columns = ('book_id', 'is_meaning', 'day', 'step', 'lapses', 'relearn', 'count')
+
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT book_id, type = %%s, MAX(0, CAST(julianday(unlock_dt) - julianday(%%s) AS INTEGER)), ' \
+              'step, MIN(forgot_cnt, %%s), group_level > 0, COUNT(*) FROM %s ' \
+              'WHERE user_id = %%s AND book_id IN (%s) AND unlock_dt < %%s GROUP BY 1, 2, 3, 4, 5, 6' \
+              % (Memory._meta.db_table, ', '.join(['%s'] * len(book_ids)))
+        utc_midnight, utc_until = [connection.ops.adapt_datetimefield_value(dt) for dt in (midnight, until)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [MemoryTypes.Meaning, utc_midnight, MAX_LAPSES, user.pk] + list(book_ids) +
+                           [utc_until])
+            rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, len(columns))
+    else:
+        counts = Counter(
+            (book_id, exam_type == MemoryTypes.Meaning, max(0, (unlock_dt - midnight).days), step,
+             min(lapses, MAX_LAPSES), level > 0)
+            for book_id, exam_type, unlock_dt, step, lapses, level in
+            Memory.objects.filter(user=user, book_id__in=book_ids, unlock_dt__lt=until)
+                          .values_list('book_id', 'type', 'unlock_dt', 'step', 'forgot_cnt', 'group_level')
+                          .iterator())
+        rows = np.array([key + (count, ) for key, count in counts.items()], dtype=np.int64).reshape(-1, len(columns))
+
+    return dict(zip(columns, rows.T))
+
+
+def get_interval_table(scheduler, max_step: int) -> 'np.ndarray':
+    # [step, lapses] -> 다음 시험까지의 날 수
+    offset = scheduler.offset.total_seconds()
+    table = np.full((max_step + 1, MAX_LAPSES + 1), GRADUATED, dtype=np.int64)
+    for step in range(max_step + 1):
+        for lapses in range(MAX_LAPSES + 1):
+            interval = scheduler.get_interval(step, lapses)
+            if interval is not None:
+                table[step, lapses] = max(1, round((interval.total_seconds() - offset) / DAY_SECONDS))
+    return table
+
+
+def simulate(days: 'np.ndarray', steps: 'np.ndarray', lapses: 'np.ndarray', relearn: 'np.ndarray',
+             counts: 'np.ndarray', scheduler, horizon: int) -> 'np.ndarray':
+    # 모든 시험을 맞춘다고 보고, 같은 상태의 카드 묶음을 한 단계씩 같이 움직이며 날짜별로 센다
+    due_counts = np.zeros(horizon, dtype=np.int64)
+    relearn_days = max(1, round(scheduler.relearn_interval.total_seconds() / DAY_SECONDS))
+    table = get_interval_table(scheduler, int(steps.max(initial=0)) + horizon)
+
+    while len(days):
+        due_counts += np.bincount(days, weights=counts, minlength=horizon)[:horizon].astype(np.int64)
+
+        # 다시 외우는 중인 카드는 step 0으로 돌아가서 relearn 간격 뒤에 본다
+        days = days + np.where(relearn, relearn_days, table[steps, lapses])
+        steps = np.where(relearn, 0, steps + 1)
+        relearn = np.zeros_like(relearn)
+
+        active = days < horizon
+        days, steps, lapses, relearn, counts = days[active], steps[active], lapses[active], relearn[active], \
+            counts[active]
+
+    return due_counts
+
+
+def forecast(user: User, books: list, horizon: int = FORECAST_DAYS, new_per_day: int = 0,
+             now: datetime = None) -> tuple:
+    __require_numpy()
+    now = now or timezone.now()
+    today = timezone.localtime(now).date()
+    midnight = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+    schedule = load_schedule(user, [book.pk for book in books], midnight, horizon)
+
+    # 매일 새 단어를 추가한다면 그날 step 0으로 한번 본다
+    new_days = np.arange(horizon, dtype=np.int64)
+    new_zeros = np.zeros(horizon, dtype=np.int64)
+    new_counts = np.full(horizon, new_per_day, dtype=np.int64)
+
+    results = []
+    for book in books:
+        scheduler = get_scheduler(book)
+        for is_meaning, exam_type in ((0, MemoryTypes.Word), (1, MemoryTypes.Meaning)):
+            selected = (schedule['book_id'] == book.pk) & (schedule['is_meaning'] == is_meaning)
+            if not selected.any() and not new_per_day:
+                continue
+
+            due_counts = simulate(np.concatenate([schedule['day'][selected], new_days]),
+                                  np.concatenate([schedule['step'][selected], new_zeros]),
+                                  np.concatenate([schedule['lapses'][selected], new_zeros]),
+                                  np.concatenate([schedule['relearn'][selected], new_zeros]).astype(bool),
+                                  np.concatenate([schedule['count'][selected], new_counts]),
+                                  scheduler, horizon)
+            results.append((book, exam_type, due_counts))
+
+    return [today + timedelta(days=day) for day in range(horizon)], results
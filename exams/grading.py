@@ -0,0 +1,187 @@
+from collections import Counter
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, DateTimeField, IntegerField, Value, When
+from django.utils import timezone
+
+from exams.counters import record_statistics, record_steps
+from exams.duecount import get_memory_key, record_moves
+from exams.models import Book, GradeEvent, Memory, MemoryStatus, User
+from exams.scheduler import Scheduler, get_scheduler
+
+BULK_UPDATE_SIZE = 50
+
+# 채점으로 바뀌는 칸만 쓴다. SQLite는 SET에 들어간 칸이 있는 인덱스만 고치므로
+# user, book, word가 들어간 인덱스는 건드리지 않는다
+AWARE_FIELDS = ('unlock_dt', 'step', 'status', 'group_level', 'aware_cnt', 'modify_dt')
+FORGOT_FIELDS = ('status', 'group_level', 'forgot_cnt', 'modify_dt')
+
+
+def get_statistics_key(memory: Memory, now: datetime) -> tuple:
+    return (memory.user_id, memory.book_id, timezone.localtime(now).date(),
+            memory.type, memory.step, memory.status)
+
+
+def apply_aware(memory: Memory, now: datetime, scheduler: Scheduler) -> tuple:
+    statistics_key = None
+
+    # 첫 테스트에 바로 맞췄다면
+    if memory.group_level <= 0:
+        # 통계 업데이트
+        statistics_key = get_statistics_key(memory, now)
+
+        # step을 증가시키고, 스케줄러에 맞게 unlock_dt 시각을 변경한다
+        memory.unlock_dt = scheduler.get_unlock_dt(memory.step, memory.forgot_cnt, now)
+        memory.step += 1
+
+        # 한번에 맞췄다면 이 단어는 안다고 볼 수 있다
+        memory.status = MemoryStatus.Aware
+
+        # 한번에 맞췄다는 숫자 표시
+        memory.aware_cnt += 1
+    # 두번째 이후에 맞췄다면
+    else:
+        # 내일 다시 테스트한다
+        memory.unlock_dt = scheduler.get_relearn_dt(now)
+
+        # 한번이라도 틀리면 스텝0부터 다시 시작한다
+        memory.step = 0
+
+    memory.group_level = 0
+    return statistics_key
+
+
+def apply_forgot(memory: Memory, now: datetime) -> tuple:
+    statistics_key = None
+
+    # 첫 테스트라면
+    if memory.group_level <= 0:
+        # 통계 업데이트
+        statistics_key = get_statistics_key(memory, now)
+
+        # 한번에 못 맞췄다는 숫자 표시
+        memory.forgot_cnt += 1
+
+    memory.status = MemoryStatus.Forgot
+    memory.group_level += 1
+    return statistics_key
+
+
+def grade_aware(memory: Memory, now: datetime = None):
+    now = now or timezone.now()
+    unlock_dt = memory.unlock_dt
+    step = memory.step
+    statistics_key = apply_aware(memory, now, get_scheduler(memory.book))
+    with transaction.atomic():
+        memory.save(update_fields=AWARE_FIELDS)
+        record_moves([(get_memory_key(memory), unlock_dt, memory.unlock_dt)])
+        record_steps([(get_memory_key(memory), step, memory.step)])
+        if statistics_key:
+            record_statistics(Counter([statistics_key]), Counter())
+
+
+def grade_forgot(memory: Memory, now: datetime = None):
+    now = now or timezone.now()
+    statistics_key = apply_forgot(memory, now)
+    with transaction.atomic():
+        memory.save(update_fields=FORGOT_FIELDS)
+        if statistics_key:
+            record_statistics(Counter(), Counter([statistics_key]))
+
+
+def grade_memory(memory_id: int, result: str, now: datetime = None) -> Memory:
+    # 쓰기 큐에서 다시 시도될 수 있으므로 매번 DB에서 새로 읽는다
+    memory = Memory.objects.select_related('book').get(pk=memory_id)
+    if result == MemoryStatus.Aware:
+        grade_aware(memory, now)
+    else:
+        grade_forgot(memory, now)
+    return memory
+
+
+def bulk_save_memories(memories: list, now: datetime = None):
+    # now가 없으면 각 Memory의 modify_dt를 그대로 저장한다
+    fields = [
+        ('unlock_dt', DateTimeField()),
+        ('step', IntegerField()),
+        ('status', CharField()),
+        ('group_level', IntegerField()),
+        ('aware_cnt', IntegerField()),
+        ('forgot_cnt', IntegerField()),
+    ]
+    if now is None:
+        fields.append(('modify_dt', DateTimeField()))
+
+    for offset in range(0, len(memories), BULK_UPDATE_SIZE):
+        chunk = memories[offset:offset + BULK_UPDATE_SIZE]
+        values = dict(
+            (name, Case(*[When(pk=memory.pk, then=Value(getattr(memory, name), output_field=field))
+                          for memory in chunk], output_field=field))
+            for name, field in fields
+        )
+        if now is not None:
+            values['modify_dt'] = now
+        Memory.objects.filter(pk__in=[memory.pk for memory in chunk]).update(**values)
+
+
+def __grade_events(user: User, events: list, now: datetime) -> dict:
+    stats = {'applied': 0, 'duplicated': 0, 'rejected': 0}
+    with transaction.atomic():
+        # 이미 반영됐거나 같은 요청에 두번 들어온 이벤트는 건너뛴다
+        event_ids = [event['id'] for event in events]
+        seen_ids = set(GradeEvent.objects.filter(event_id__in=event_ids).values_list('event_id', flat=True))
+        fresh_events = []
+        for event in events:
+            if event['id'] not in seen_ids:
+                seen_ids.add(event['id'])
+                fresh_events.append(event)
+        stats['duplicated'] = len(events) - len(fresh_events)
+
+        # 다른 학습자의 카드나 없는 카드에 대한 이벤트는 버린다
+        memories = Memory.objects.filter(user=user).in_bulk(set(event['memory_id'] for event in fresh_events))
+        events = [event for event in fresh_events if event['memory_id'] in memories]
+        stats['rejected'] = len(fresh_events) - len(events)
+        stats['applied'] = len(events)
+        if not events:
+            return stats
+
+        GradeEvent.objects.bulk_create([
+            GradeEvent(event_id=event['id'], memory_id=event['memory_id'],
+                       result=event['result'], answered_dt=event['answered_at'])
+            for event in events
+        ])
+
+        unlock_dts = dict((memory.pk, memory.unlock_dt) for memory in memories.values())
+        steps = dict((memory.pk, memory.step) for memory in memories.values())
+        schedulers = dict((book.pk, get_scheduler(book)) for book in
+                          Book.objects.filter(pk__in=set(memory.book_id for memory in memories.values())))
+        aware_counts = Counter()
+        forgot_counts = Counter()
+
+        for event in sorted(events, key=lambda e: e['answered_at']):
+            memory = memories[event['memory_id']]
+            if event['result'] == MemoryStatus.Aware:
+                aware_counts[apply_aware(memory, event['answered_at'], schedulers[memory.book_id])] += 1
+            elif event['result'] == MemoryStatus.Forgot:
+                forgot_counts[apply_forgot(memory, event['answered_at'])] += 1
+
+        aware_counts.pop(None, None)
+        forgot_counts.pop(None, None)
+
+        bulk_save_memories(list(memories.values()), now)
+        record_moves([(get_memory_key(memory), unlock_dts[memory.pk], memory.unlock_dt)
+                      for memory in memories.values()])
+        record_steps([(get_memory_key(memory), steps[memory.pk], memory.step) for memory in memories.values()])
+        record_statistics(aware_counts, forgot_counts)
+
+    return stats
+
+
+def grade_events(user: User, events: list, now: datetime = None) -> dict:
+    now = now or timezone.now()
+    try:
+        return __grade_events(user, events, now)
+    except IntegrityError:
+        # 같은 이벤트가 동시에 들어왔다면 먼저 반영된 쪽을 빼고 한번 더 시도한다
+        return __grade_events(user, events, now)
@@ -0,0 +1,161 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from exams.cards import get_neighbor_ids, rebuild_cards
+from exams.grading import BULK_UPDATE_SIZE
+from exams.models import Book, Word
+from exams.search import index_words
+from exams.sync import mark_pending
+
+IMPORT_BATCH_SIZE = 500
+
+WORD_FIELDS = ('word', 'pronunciation', 'meaning', 'naver_link')
+RELATION_FIELDS = ('related', 'synonym', 'antonym')
+
+FORMATS = ('csv', 'tsv', 'jsonl')
+
+
+def get_format(filename: str) -> str:
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension not in FORMATS:
+        raise ValueError('Unknown file format: %s' % filename)
+    return extension
+
+
+def __split_terms(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(';')
+    return [term.strip() for term in value if term.strip()]
+
+
+def iter_records(fileobj, fmt: str):
+    if fmt == 'jsonl':
+        rows = (json.loads(line) for line in fileobj if line.strip())
+    else:
+        rows = csv.DictReader(fileobj, delimiter='\t' if fmt == 'tsv' else ',')
+
+    for row in rows:
+        word = (row.get('word') or '').strip()
+        if not word:
+            continue
+        record = dict((field, (row.get(field) or '').strip()) for field in WORD_FIELDS)
+        record['word'] = word
+        for field in RELATION_FIELDS:
+            record[field] = __split_terms(row.get(field))
+        yield record
+
+
+def iter_chunks(records, size: int = IMPORT_BATCH_SIZE):
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def __get_word_ids(book: Book, words) -> dict:
+    return dict(Word.objects.filter(book=book, word__in=words).values_list('word', 'pk'))
+
+
+def __update_words(rows: list):
+    # rows: [(pk, record)] 필드마다 CASE 하나로 chunk를 한번에 고친다
+    now = timezone.now()
+    for offset in range(0, len(rows), BULK_UPDATE_SIZE):
+        chunk = rows[offset:offset + BULK_UPDATE_SIZE]
+        values = dict(
+            (field, Case(*[When(pk=pk, then=Value(record[field])) for pk, record in chunk],
+                         output_field=Word._meta.get_field(field)))
+            for field in WORD_FIELDS
+        )
+        Word.objects.filter(pk__in=[pk for pk, _ in chunk]).update(modify_dt=now, **values)
+
+
+def __upsert_words(book: Book, records: list, stats: dict, touched: dict):
+    # 같은 chunk 안에서 중복된 단어는 마지막 줄을 쓴다
+    records = dict((record['word'], record) for record in records)
+    existing = dict((row[0], row) for row in Word.objects.filter(book=book, word__in=records.keys())
+                                                         .values_list(*(WORD_FIELDS + ('pk', ))))
+
+    new_words = []
+    changed = []
+    for word, record in records.items():
+        values = tuple(record[field] for field in WORD_FIELDS)
+        if word not in existing:
+            new_words.append(Word(book=book, **dict(zip(WORD_FIELDS, values))))
+        elif existing[word][:len(WORD_FIELDS)] != values:
+            changed.append((existing[word][-1], record))
+
+    if changed:
+        __update_words(changed)
+        touched['updated'].update(pk for pk, _ in changed)
+        # 고친 단어는 관련어 카드의 링크에도 나온다
+        touched['neighbors'].update(get_neighbor_ids([pk for pk, _ in changed]))
+        stats['updated'] += len(changed)
+
+    if new_words:
+        Word.objects.bulk_create(new_words)
+        # bulk_create는 post_save 시그널을 보내지 않는다
+        new_ids = list(__get_word_ids(book, [word.word for word in new_words]).values())
+        mark_pending(book.pk, new_ids)
+        touched['created'].update(new_ids)
+        stats['created'] += len(new_words)
+
+
+def __link_relations(book: Book, records: list, stats: dict, touched: dict):
+    words = set()
+    for record in records:
+        words.add(record['word'])
+        for field in RELATION_FIELDS:
+            words.update(record[field])
+    word_ids = __get_word_ids(book, words)
+
+    for field in RELATION_FIELDS:
+        through = getattr(Word, field).through
+        pairs = set()
+        for record in records:
+            for term in record[field]:
+                if term not in word_ids:
+                    stats['missing_terms'] += 1
+                elif term != record['word']:
+                    # symmetrical 관계이므로 양방향으로 넣는다
+                    pairs.add((word_ids[record['word']], word_ids[term]))
+                    pairs.add((word_ids[term], word_ids[record['word']]))
+        if not pairs:
+            continue
+
+        from_ids = set(from_id for from_id, _ in pairs)
+        pairs.difference_update(through.objects.filter(from_word_id__in=from_ids)
+                                               .values_list('from_word_id', 'to_word_id'))
+        through.objects.bulk_create([through(from_word_id=from_id, to_word_id=to_id) for from_id, to_id in pairs])
+        touched['linked'].update(from_id for from_id, _ in pairs)
+        stats['linked'] += len(pairs)
+
+
+def import_words(book: Book, fileobj, fmt: str) -> dict:
+    stats = {'created': 0, 'updated': 0, 'linked': 0, 'missing_terms': 0}
+    touched = {'created': set(), 'updated': set(), 'neighbors': set(), 'linked': set()}
+
+    # 관계어가 파일 뒤쪽에 나올 수 있으므로 단어를 먼저 모두 넣고 다시 읽는다
+    for records in iter_chunks(iter_records(fileobj, fmt)):
+        with transaction.atomic():
+            __upsert_words(book, records, stats, touched)
+
+    fileobj.seek(0)
+    for records in iter_chunks(iter_records(fileobj, fmt)):
+        with transaction.atomic():
+            __link_relations(book, records, stats, touched)
+
+    # bulk로 넣은 단어와 관계는 시그널을 거치지 않으므로 바뀐 단어의 카드와 검색 색인만 다시 만든다.
+    # 새로 이은 관계는 양방향으로 넣으므로 양쪽 단어가 모두 linked에 들어 있다
+    indexed_ids = touched['created'] | touched['updated']
+    card_ids = indexed_ids | touched['neighbors'] | touched['linked']
+    rebuild_cards(sorted(card_ids))
+    index_words(sorted(indexed_ids))
+    return stats
@@ -0,0 +1,222 @@
+import multiprocessing
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User as AuthUser
+from django.db import OperationalError, connection, connections
+from django.test import Client
+
+from exams.benchmarks import percentiles, seed_book
+from exams.models import Book, MemoryTypes, User
+from exams.sync import sync_memories
+from exams.writer import is_locked
+
+AWARE_URL = re.compile(r"'/exams/aware/(\d+)'")
+
+# 통과 여부를 비교하는 지표. 늘어나면 느려진 것이다
+REGRESSION_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+@contextmanager
+def throwaway_database():
+    # 여러 스레드와 프로세스가 같은 DB를 쓰므로 메모리 DB 대신 파일을 쓴다
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(), 'gengoz-loadtest.sqlite3')
+
+    # 테스트 클라이언트는 testserver 호스트로 요청한다
+    settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ['testserver']
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed(users: int, books: int, words: int, synced: bool = True) -> list:
+    # 학습자마다 모든 책을 구독한 상태로 만든다. synced가 아니면 첫 시험 화면에서 동기화한다
+    owner = User.objects.create(name='loadtest-owner')
+    seeded_books = [seed_book(owner, 'loadtest-%d' % i, words) for i in range(books)]
+
+    learners = []
+    for i in range(users):
+        auth_user = AuthUser.objects.create_user('loadtest-%d' % i)
+        user = User.objects.create(name='loadtest-%d' % i, auth_user=auth_user)
+        if synced:
+            for book in seeded_books:
+                sync_memories(user, book, MemoryTypes.Word)
+        learners.append(auth_user)
+    return learners
+
+
+class Worker(threading.Thread):
+    def __init__(self, auth_user: AuthUser, books: list, deadline: float, forgot_ratio: float):
+        super().__init__(daemon=True)
+        self.auth_user = auth_user
+        self.books = books
+        self.deadline = deadline
+        self.forgot_ratio = forgot_ratio
+        self.samples = {'exam': [], 'answer': []}
+        self.queries = []
+        self.errors = 0
+
+    def request(self, client: Client, kind: str, path: str):
+        started = time.perf_counter()
+        response = client.get(path)
+        self.samples[kind].append(time.perf_counter() - started)
+        # 요청이 시작될 때마다 이 스레드 connection의 쿼리 기록이 비워진다
+        self.queries.append(len(connection.queries))
+        if response.status_code not in (200, 302):
+            self.errors += 1
+        return response
+
+    def run(self):
+        connection.force_debug_cursor = True
+        client = Client()
+        client.force_login(self.auth_user)
+        try:
+            while time.perf_counter() < self.deadline:
+                book = random.choice(self.books)
+                response = self.request(client, 'exam', '/exams/%d/w/' % book.pk)
+                match = AWARE_URL.search(response.content.decode('utf-8'))
+                if match is None:
+                    continue
+
+                answer = 'forgot' if random.random() < self.forgot_ratio else 'aware'
+                self.request(client, 'answer', '/exams/%s/%s' % (answer, match.group(1)))
+        finally:
+            connection.close()
+
+
+def run(learners: list, concurrency: int, duration: float, forgot_ratio: float = 0.2) -> dict:
+    books = list(Book.objects.filter(title__startswith='loadtest-'))
+    deadline = time.perf_counter() + duration
+    workers = [Worker(learners[i % len(learners)], books, deadline, forgot_ratio) for i in range(concurrency)]
+
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    result = {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'errors': sum(worker.errors for worker in workers),
+    }
+    requests = 0
+    for kind in ('exam', 'answer'):
+        samples = [sample for worker in workers for sample in worker.samples[kind]]
+        requests += len(samples)
+        result[kind] = dict(percentiles(samples), requests=len(samples)) if samples else {'requests': 0}
+
+    queries = [count for worker in workers for count in worker.queries]
+    result['requests_per_s'] = round(requests / elapsed, 1)
+    result['queries_per_request'] = round(sum(queries) / len(queries), 2) if queries else 0
+    return result
+
+
+def compare(result: dict, baseline: dict, max_slowdown: float) -> list:
+    # 기준보다 max_slowdown % 넘게 느려진 지표
+    regressions = []
+    for kind in ('exam', 'answer'):
+        for metric in REGRESSION_METRICS:
+            if not baseline.get(kind, {}).get(metric) or metric not in result.get(kind, {}):
+                continue
+            slowdown = (result[kind][metric] / baseline[kind][metric] - 1) * 100
+            if slowdown > max_slowdown:
+                regressions.append('%s %s: %.2fms -> %.2fms (+%.0f%%)'
+                                   % (kind, metric, baseline[kind][metric], result[kind][metric], slowdown))
+
+    if baseline.get('requests_per_s'):
+        slowdown = (baseline['requests_per_s'] / max(result['requests_per_s'], 0.1) - 1) * 100
+        if slowdown > max_slowdown:
+            regressions.append('requests_per_s: %.1f -> %.1f' % (baseline['requests_per_s'], result['requests_per_s']))
+    return regressions
+
+
+def __stress_process(learners: list, books: list, threads: int, deadline: float, results: multiprocessing.Queue):
+    samples = {'exam': [], 'answer': []}
+    errors = Counter()
+
+    def loop(auth_user: AuthUser):
+        client = Client()
+        client.force_login(auth_user)
+        try:
+            while time.time() < deadline:
+                book = random.choice(books)
+                try:
+                    # 시험 화면에서 동기화와 남은 카드 수 집계를 쓰고, 채점에서 다시 쓴다
+                    started = time.perf_counter()
+                    response = client.get('/exams/%d/w/' % book.pk)
+                    exam_done = time.perf_counter()
+                    match = AWARE_URL.search(response.content.decode('utf-8'))
+                    if match is None:
+                        continue
+                    answer = 'forgot' if random.random() < 0.2 else 'aware'
+                    client.get('/exams/%s/%s' % (answer, match.group(1)))
+                except OperationalError as e:
+                    errors['locked' if is_locked(e) else 'failed'] += 1
+                    continue
+                except Exception:
+                    errors['failed'] += 1
+                    continue
+                samples['exam'].append(exam_done - started)
+                samples['answer'].append(time.perf_counter() - exam_done)
+        finally:
+            connection.close()
+
+    # 여러 스레드와 프로세스가 같은 학습자를 나눠 써서 첫 동기화가 겹친다
+    workers = [threading.Thread(target=loop, args=(random.choice(learners), )) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((samples, errors))
+
+
+def stress_writes(learners: list, processes: int, threads: int, duration: float) -> dict:
+    # 여러 프로세스에서 동시에 시험 화면을 열고 채점한다
+    books = list(Book.objects.filter(title__startswith='loadtest-'))
+    connections.close_all()
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    deadline = time.time() + duration
+    children = [context.Process(target=__stress_process, args=(learners, books, threads, deadline, results))
+                for _ in range(processes)]
+
+    started = time.time()
+    for child in children:
+        child.start()
+    samples = {'exam': [], 'answer': []}
+    errors = Counter()
+    for _ in children:
+        child_samples, child_errors = results.get()
+        for kind in samples:
+            samples[kind] += child_samples[kind]
+        errors.update(child_errors)
+    for child in children:
+        child.join()
+    elapsed = time.time() - started
+
+    result = {
+        'processes': processes,
+        'threads': threads,
+        'duration_s': round(elapsed, 2),
+        'locked_errors': errors['locked'],
+        'other_errors': errors['failed'],
+        'answers_per_s': round(len(samples['answer']) / elapsed, 1),
+    }
+    for kind in samples:
+        result[kind] = dict(percentiles(samples[kind]), requests=len(samples[kind])) if samples[kind] \
+            else {'requests': 0}
+    return result
@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from exams.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = 'Run a benchmark against a throwaway test database and print the results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(BENCHMARKS.keys()))
+        parser.add_argument('--sizes', default='1000,5000,20000',
+                            help='Comma separated list of data set sizes.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma separated list of integers.')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = BENCHMARKS[options['name']](sizes)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(json.dumps(results, indent=2))
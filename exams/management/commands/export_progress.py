@@ -0,0 +1,25 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.models import User
+from exams.progress import export_progress
+
+
+class Command(BaseCommand):
+    help = "Export a user's memories and statistics as gzipped JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_name')
+        parser.add_argument('path')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(name=options['user_name'])
+        except User.DoesNotExist:
+            raise CommandError('User %s does not exist.' % options['user_name'])
+
+        with gzip.open(options['path'], 'wt', encoding='utf-8') as fileobj:
+            stats = export_progress(user, fileobj)
+
+        self.stdout.write('%d memories and %d statistics exported' % (stats['memories'], stats['statistics']))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.forecast import FORECAST_DAYS, forecast
+from exams.models import Book, User
+
+
+class Command(BaseCommand):
+    help = 'Forecast how many cards of a user unlock per day, optionally with N new words a day.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int)
+        parser.add_argument('book_id', type=int, nargs='*')
+        parser.add_argument('--type', choices=['w', 'm'])
+        parser.add_argument('--days', type=int, default=FORECAST_DAYS)
+        parser.add_argument('--new-per-day', type=int, default=0, dest='new_per_day')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(pk=options['user_id'])
+        except User.DoesNotExist:
+            raise CommandError('User %d does not exist.' % options['user_id'])
+        books = Book.objects.filter(memory__user=user).distinct()
+        if options['book_id']:
+            books = Book.objects.filter(pk__in=options['book_id'])
+
+        started = time.perf_counter()
+        try:
+            dates, results = forecast(user, list(books), options['days'], options['new_per_day'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        results = [result for result in results if options['type'] in (None, result[1])]
+        self.stdout.write('\t'.join(['date'] + ['%s/%s' % (book.title, exam_type) for book, exam_type, _ in results]))
+        for day, date in enumerate(dates):
+            self.stdout.write('\t'.join([date.isoformat()] + [str(counts[day]) for _, _, counts in results]))
+        self.stdout.write('forecast in %.2fs' % elapsed)
@@ -0,0 +1,26 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.models import User
+from exams.progress import import_progress
+
+
+class Command(BaseCommand):
+    help = "Import a user's memories and statistics from a file written by export_progress."
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_name')
+        parser.add_argument('path')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(name=options['user_name'])
+        except User.DoesNotExist:
+            raise CommandError('User %s does not exist.' % options['user_name'])
+
+        with gzip.open(options['path'], 'rt', encoding='utf-8') as fileobj:
+            stats = import_progress(user, fileobj)
+
+        self.stdout.write('%d memories and %d statistics imported, %d rows skipped'
+                          % (stats['memories'], stats['statistics'], stats['skipped']))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.importer import FORMATS, get_format, import_words
+from exams.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Import words into a book from a CSV, TSV or JSONL file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+
+    def handle(self, *args, **options):
+        try:
+            book = Book.objects.get(pk=options['book_id'])
+            fmt = options['format'] or get_format(options['path'])
+        except Book.DoesNotExist:
+            raise CommandError('Book %d does not exist.' % options['book_id'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        with open(options['path'], encoding='utf-8-sig', newline='') as fileobj:
+            stats = import_words(book, fileobj, fmt)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write('%s: %d created, %d updated, %d relations linked, %d unknown terms in %.2fs'
+                          % (book.title, stats['created'], stats['updated'], stats['linked'],
+                             stats['missing_terms'], elapsed))
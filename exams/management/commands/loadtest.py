@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from exams import loadtest
+
+
+class Command(BaseCommand):
+    help = 'Drive the exam -> aware/forgot loop against a seeded throwaway database and print the results as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--books', type=int, default=1)
+        parser.add_argument('--words', type=int, default=1000, help='Words per book.')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10, help='Seconds to drive the loop.')
+        parser.add_argument('--forgot-ratio', type=float, default=0.2, dest='forgot_ratio')
+        parser.add_argument('--output', help='Also write the results to this file, e.g. to use as a baseline.')
+        parser.add_argument('--baseline', help='Fail when slower than the results in this file.')
+        parser.add_argument('--max-slowdown', type=float, default=10, dest='max_slowdown',
+                            help='Allowed slowdown against the baseline in percent.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        with loadtest.throwaway_database():
+            learners = loadtest.seed(options['users'], options['books'], options['words'])
+            connection.close()
+            result = loadtest.run(learners, options['concurrency'], options['duration'], options['forgot_ratio'])
+
+        result['data'] = dict((name, options[name]) for name in ('users', 'books', 'words'))
+        output = json.dumps(result, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+
+        if baseline is not None:
+            regressions = loadtest.compare(result, baseline, options['max_slowdown'])
+            if regressions:
+                raise CommandError('Slower than the baseline:\n' + '\n'.join(regressions))
+            self.stdout.write('No regression against %s' % options['baseline'])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from exams.cards import rebuild_book_cards
+from exams.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed card HTML of every word.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_id', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        books = Book.objects.all()
+        if options['book_id']:
+            books = books.filter(pk__in=options['book_id'])
+
+        for book in books:
+            self.stdout.write('%s: %d cards rebuilt' % (book.title, rebuild_book_cards(book)))
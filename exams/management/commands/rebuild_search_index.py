@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from exams.models import Book
+from exams.search import index_book
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index of every word.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_id', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        books = Book.objects.all()
+        if options['book_id']:
+            books = books.filter(pk__in=options['book_id'])
+
+        for book in books:
+            self.stdout.write('%s: %d words indexed' % (book.title, index_book(book)))
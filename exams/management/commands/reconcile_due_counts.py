@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from exams.duecount import get_due_count, rebuild_counter
+from exams.models import DueCounter, Memory
+
+
+class Command(BaseCommand):
+    help = 'Compare maintained due counts against COUNT(*) over Memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', dest='fix',
+                            help='Rebuild counters that do not match.')
+
+    def handle(self, *args, **options):
+        mismatches = 0
+
+        for user_id, book_id, exam_type in DueCounter.objects.values_list('user_id', 'book_id', 'type'):
+            key = (user_id, book_id, exam_type)
+            now = timezone.now()
+            maintained = get_due_count(key, now)
+            actual = Memory.objects.filter(user_id=user_id, book_id=book_id, type=exam_type,
+                                           unlock_dt__lte=now).count()
+            if maintained == actual:
+                continue
+
+            mismatches += 1
+            self.stdout.write('user=%d book=%d type=%s: maintained %d, actual %d'
+                              % (user_id, book_id, exam_type, maintained, actual))
+            if options['fix']:
+                rebuild_counter(key, now)
+
+        self.stdout.write('%d mismatched counters' % mismatches)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from exams.duecount import rebuild_counters
+from exams.models import Book
+from exams.scheduler import get_scheduler
+
+
+class Command(BaseCommand):
+    help = "Recompute unlock_dt for every memory of a book with the book's current scheduler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('book_id', nargs='+', type=int)
+
+    def handle(self, *args, **options):
+        for book_id in options['book_id']:
+            try:
+                book = Book.objects.get(pk=book_id)
+            except Book.DoesNotExist:
+                raise CommandError('Book %d does not exist.' % book_id)
+
+            with transaction.atomic():
+                updated = get_scheduler(book).reschedule(book.memory_set.all())
+                rebuild_counters(book_id=book.pk)
+
+            self.stdout.write('%s: %d memories rescheduled' % (book.title, updated))
@@ -0,0 +1,33 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from exams.duecount import rebuild_counters
+from exams.models import Memory
+from exams.scheduler import shift
+
+
+class Command(BaseCommand):
+    help = 'Shift every unlock_dt of a user/book by an offset.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int)
+        parser.add_argument('book_id', type=int)
+        parser.add_argument('--type', choices=['w', 'm'])
+        parser.add_argument('--days', type=float, default=0)
+        parser.add_argument('--hours', type=float, default=0)
+
+    def handle(self, *args, **options):
+        filters = dict(user_id=options['user_id'], book_id=options['book_id'])
+        if options['type']:
+            filters['type'] = options['type']
+        offset = timedelta(days=options['days'], hours=options['hours'])
+
+        started = time.perf_counter()
+        shifted = shift(Memory.objects.filter(**filters), offset)
+        rebuild_counters(**filters)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write('%d cards shifted by %s in %.2fs (%.0f rows/s)'
+                          % (shifted, offset, elapsed, shifted / elapsed))
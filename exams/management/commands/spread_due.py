@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from exams.duecount import rebuild_counters
+from exams.models import Memory
+from exams.scheduler import spread_due
+
+
+class Command(BaseCommand):
+    help = 'Spread the due cards of a user/book across the next N days with a daily cap.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int)
+        parser.add_argument('book_id', type=int)
+        parser.add_argument('--type', choices=['w', 'm'])
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--cap', type=int, default=100, help='Most cards left due per day.')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['cap'] < 1:
+            raise CommandError('--days and --cap must be at least 1.')
+
+        filters = dict(user_id=options['user_id'], book_id=options['book_id'])
+        if options['type']:
+            filters['type'] = options['type']
+
+        started = time.perf_counter()
+        moved, left = spread_due(Memory.objects.filter(**filters), timezone.now(), options['days'], options['cap'])
+        rebuild_counters(**filters)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write('%d cards moved in %.2fs (%.0f rows/s)' % (moved, elapsed, moved / elapsed))
+        if left:
+            self.stdout.write('%d cards did not fit in %d days at %d a day and are still due.'
+                              % (left, options['days'], options['cap']))
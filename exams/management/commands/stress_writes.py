@@ -0,0 +1,36 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from exams import loadtest
+
+
+class Command(BaseCommand):
+    help = 'Open exam pages and grade from several processes at once against a seeded throwaway database and ' \
+           'print the lock errors and answer throughput as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--words', type=int, default=1000)
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=4, help='Threads per process.')
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--no-wal', action='store_true', dest='no_wal',
+                            help='Use the rollback journal to compare against.')
+        parser.add_argument('--no-queue', action='store_true', dest='no_queue',
+                            help='Write from each request thread instead of the single writer.')
+
+    def handle(self, *args, **options):
+        if options['no_wal']:
+            settings.SQLITE_PRAGMAS = [('journal_mode', 'DELETE')]
+        if options['no_queue']:
+            settings.SQLITE_WRITE_QUEUE = False
+
+        with loadtest.throwaway_database():
+            # 아직 동기화하지 않은 학습자로 시작해서 첫 동기화와 카운터 생성도 겹치게 한다
+            learners = loadtest.seed(options['users'], 1, options['words'], synced=False)
+            result = loadtest.stress_writes(learners, options['processes'], options['threads'], options['duration'])
+
+        result.update(wal=not options['no_wal'], queue=not options['no_queue'])
+        self.stdout.write(json.dumps(result, indent=2))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from exams.models import Book, User
+from exams.sync import get_subscriptions, process_pending, sync_memories
+from exams.writer import write
+
+
+class Command(BaseCommand):
+    help = 'Create Memory rows for words queued since the last sync.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', dest='all',
+                            help='Reconcile every subscription instead of only the pending queue.')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            books = Book.objects.all()
+        else:
+            books = Book.objects.filter(has_pending_words=True)
+
+        for book in books:
+            created = write(process_pending, book)
+            if options['all']:
+                for user_id, exam_type in get_subscriptions(book):
+                    created += write(sync_memories, User.objects.get(pk=user_id), book, exam_type)
+            self.stdout.write('%s: %d memories created' % (book.title, created))
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.db.backends.utils import CursorDebugWrapper, CursorWrapper
+
+logger = logging.getLogger('exams.metrics')
+
+# 히스토그램 구간의 위쪽 경계
+TIME_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# IN (%s, %s, ...)는 개수와 상관없이 같은 쿼리로 본다
+IN_LIST = re.compile(r'\(%s(?:, %s)*\)')
+
+# 지금 스레드에서 기록중인 요청의 [(sql, 초)]
+current = threading.local()
+
+
+def record_query(sql: str, duration: float):
+    queries = getattr(current, 'queries', None)
+    if queries is not None:
+        queries.append((sql, duration))
+
+
+class MetricsCursorWrapper(CursorWrapper):
+    def execute(self, sql, params=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, param_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, param_list)
+        finally:
+            record_query(sql, time.perf_counter() - started)
+
+
+class MetricsDebugCursorWrapper(MetricsCursorWrapper, CursorDebugWrapper):
+    pass
+
+
+def instrument(connection):
+    # DEBUG 커서는 SQLite에서 파라미터를 보여주려고 쿼리마다 쿼리를 한번 더 실행하므로 쓰지 않는다.
+    # 쿼리를 그대로 두고 실행 시간만 잰다
+    if 'make_cursor' not in connection.__dict__:
+        connection.make_cursor = lambda cursor: MetricsCursorWrapper(cursor, connection)
+        connection.make_debug_cursor = lambda cursor: MetricsDebugCursorWrapper(cursor, connection)
+
+
+def start_request():
+    current.queries = []
+
+
+def finish_request() -> list:
+    queries, current.queries = getattr(current, 'queries', None) or [], None
+    return queries
+
+
+class Histogram:
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.max = 0
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def get_percentile(self, percent: int) -> float:
+        # 그 값이 들어있는 구간의 위쪽 경계
+        rank = sum(self.counts) * percent / 100
+        seen = 0
+        for bound, count in zip(self.bounds + (None, ), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound is not None else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        count = sum(self.counts)
+        return {
+            'count': count,
+            'mean': round(self.total / count, 3) if count else None,
+            'max': round(self.max, 3),
+            'p50': self.get_percentile(50),
+            'p95': self.get_percentile(95),
+            'p99': self.get_percentile(99),
+            'buckets': [[bound, count] for bound, count in zip(self.bounds + ('+Inf', ), self.counts)],
+        }
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.wall_ms = Histogram(TIME_BUCKETS_MS)
+        self.sql_ms = Histogram(TIME_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.repeated_cnt = 0
+        self.repeated_sql = None
+
+    def as_dict(self) -> dict:
+        return {
+            'wall_ms': self.wall_ms.as_dict(),
+            'sql_ms': self.sql_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'repeated_cnt': self.repeated_cnt,
+            'repeated_sql': self.repeated_sql,
+        }
+
+
+__views = {}
+__views_lock = threading.Lock()
+__started_dt = time.time()
+
+
+def get_repeated_query(queries: list) -> tuple:
+    # 한 요청에서 같은 모양의 쿼리가 가장 많이 실행된 횟수
+    shapes = Counter(IN_LIST.sub('(%s, ...)', sql) if '(%s' in sql else sql for sql, _ in queries)
+    return shapes.most_common(1)[0] if shapes else (None, 0)
+
+
+def record_request(view_name: str, wall_time: float, queries: list):
+    sql_time = sum(duration for _, duration in queries)
+    repeated_sql, repeated_cnt = get_repeated_query(queries)
+    repeated = repeated_cnt > settings.METRICS_REPEAT_THRESHOLD
+
+    with __views_lock:
+        metrics = __views.get(view_name)
+        if metrics is None:
+            metrics = __views[view_name] = ViewMetrics()
+        metrics.wall_ms.add(wall_time * 1000)
+        metrics.sql_ms.add(sql_time * 1000)
+        metrics.queries.add(len(queries))
+        if repeated:
+            metrics.repeated_cnt += 1
+            metrics.repeated_sql = repeated_sql
+
+    # 로그 한 줄이 요청 하나의 JSON이다
+    level = logging.WARNING if repeated else logging.INFO
+    if logger.isEnabledFor(level):
+        logger.log(level, json.dumps({
+            'time': round(time.time(), 3),
+            'view': view_name,
+            'wall_ms': round(wall_time * 1000, 3),
+            'sql_ms': round(sql_time * 1000, 3),
+            'queries': len(queries),
+            'repeated_sql': repeated_sql if repeated else None,
+            'repeated_cnt': repeated_cnt if repeated else None,
+        }))
+
+
+def get_snapshot() -> dict:
+    with __views_lock:
+        views = dict((view_name, metrics.as_dict()) for view_name, metrics in __views.items())
+    # 프로세스마다 따로 모은다
+    return {'pid': os.getpid(), 'since': __started_dt, 'views': views}
+
+
+def reset():
+    with __views_lock:
+        __views.clear()
@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+from exams import metrics
+
+
+class MetricsMiddleware:
+    def __init__(self):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+
+    def process_request(self, request: HttpRequest):
+        for db_connection in connections.all():
+            metrics.instrument(db_connection)
+        metrics.start_request()
+        request._metrics_started = time.perf_counter()
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        started = getattr(request, '_metrics_started', None)
+        if started is None:
+            return response
+
+        # admin 화면은 admin:exams_word_changelist 처럼 namespace를 붙인다
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match is not None else 'unresolved'
+        metrics.record_request(view_name, time.perf_counter() - started, metrics.finish_request())
+        return response
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 13:04
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0023_auto_20160513_0028'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingWord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create_dt', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='has_pending_words',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='word',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Book'),
+        ),
+        migrations.AlterField(
+            model_name='word',
+            name='pronunciation',
+            field=models.CharField(blank=True, max_length=256),
+        ),
+        migrations.AddField(
+            model_name='pendingword',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Book'),
+        ),
+        migrations.AddField(
+            model_name='pendingword',
+            name='word',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Word'),
+        ),
+    ]
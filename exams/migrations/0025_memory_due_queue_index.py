@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 13:04
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0024_pendingword'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='memory',
+            index_together=set([('user', 'book', 'type', 'create_dt'), ('user', 'book', 'type', 'unlock_dt'), ('user', 'book', 'type', 'group_level', 'unlock_dt')]),
+        ),
+    ]
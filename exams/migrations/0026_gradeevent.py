@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 13:07
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0025_memory_due_queue_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=64, unique=True)),
+                ('result', models.CharField(choices=[('u', 'Unknown'), ('a', 'Aware'), ('f', 'Forgot')], max_length=1)),
+                ('answered_dt', models.DateTimeField()),
+                ('create_dt', models.DateTimeField(auto_now_add=True)),
+                ('memory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Memory')),
+            ],
+        ),
+    ]
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 13:09
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0026_gradeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DueCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('w', 'Word'), ('m', 'Meaning')], max_length=1)),
+                ('due_cnt', models.IntegerField(default=0)),
+                ('count_dt', models.DateTimeField()),
+                ('create_dt', models.DateTimeField(auto_now_add=True)),
+                ('modify_dt', models.DateTimeField(auto_now=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.User')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UnlockBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('w', 'Word'), ('m', 'Meaning')], max_length=1)),
+                ('bucket_dt', models.DateTimeField()),
+                ('unlock_cnt', models.IntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.User')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='memory',
+            name='unlock_dt',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterUniqueTogether(
+            name='unlockbucket',
+            unique_together=set([('user', 'book', 'type', 'bucket_dt')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='duecounter',
+            unique_together=set([('user', 'book', 'type')]),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 13:10
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0027_due_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='scheduler',
+            field=models.CharField(choices=[('leitner', 'Leitner'), ('sm2', 'SM-2')], default='leitner', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='scheduler_params',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 13:15
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+# exams.cards가 바뀌어도 이 migration은 처음 만들 때와 같게 그리도록 복사해 둔다
+CARD_BATCH_SIZE = 200
+
+
+def string_with_link(word) -> str:
+    content = '%s(%s)' % (word.word, word.meaning)
+    if word.naver_link:
+        return '<a href="http://jpdic.naver.com/entry/jk/%s.nhn" target="_blank">%s</a>' % (word.naver_link, content)
+    return content
+
+
+def render_related_terms(word) -> str:
+    result = [string_with_link(word)]
+    for label, field in (('관', 'related'), ('유', 'synonym'), ('반', 'antonym')):
+        terms = list(getattr(word, field).all())
+        if terms:
+            result.append('[%s] %s' % (label, ' '.join([string_with_link(term) for term in terms])))
+    return ' / '.join(result)
+
+
+def build_cards(apps, schema_editor):
+    from django.db.models import Case, TextField, Value, When
+
+    Word = apps.get_model('exams', 'Word')
+    last_pk = 0
+    while True:
+        words = list(Word.objects.filter(pk__gt=last_pk).order_by('pk')
+                                 .prefetch_related('related', 'synonym', 'antonym')[:CARD_BATCH_SIZE])
+        if not words:
+            break
+        Word.objects.filter(pk__in=[word.pk for word in words]).update(card_html=Case(
+            *[When(pk=word.pk, then=Value(render_related_terms(word))) for word in words],
+            output_field=TextField()))
+        last_pk = words[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0028_book_scheduler'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='card_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(build_cards, migrations.RunPython.noop),
+    ]
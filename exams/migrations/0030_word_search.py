@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+# exams.search가 바뀌어도 이 migration은 처음 만들 때와 같게 색인하도록 복사해 둔다
+SEARCH_TABLE = 'exams_word_search'
+INDEX_BATCH_SIZE = 500
+SEARCH_FIELDS = ('word', 'pronunciation', 'meaning')
+
+KATAKANA = re.compile('[ァ-ヶ]')
+
+
+def normalize(text: str) -> str:
+    # 전각/반각을 맞추고 가타카나는 히라가나로 바꾼다
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return KATAKANA.sub(lambda match: chr(ord(match.group()) - 0x60), text)
+
+
+def get_search_text(word: str, pronunciation: str, meaning: str) -> str:
+    return normalize('\n'.join((word, pronunciation, meaning)))
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("CREATE VIRTUAL TABLE %s USING fts5(content, tokenize='trigram')" % SEARCH_TABLE)
+
+        Word = apps.get_model('exams', 'Word')
+        last_pk = 0
+        while True:
+            rows = list(Word.objects.filter(pk__gt=last_pk).order_by('pk')
+                                    .values_list('pk', *SEARCH_FIELDS)[:INDEX_BATCH_SIZE])
+            if not rows:
+                break
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany('INSERT INTO %s (rowid, content) VALUES (%%s, %%s)' % SEARCH_TABLE,
+                                   [(pk, get_search_text(*texts)) for pk, *texts in rows])
+            last_pk = rows[-1][0]
+
+    elif schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for field in SEARCH_FIELDS:
+            schema_editor.execute('CREATE INDEX exams_word_%s_trgm ON exams_word USING gin '
+                                  '(UPPER("%s"::text) gin_trgm_ops)' % (field, field))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE %s' % SEARCH_TABLE)
+    elif schema_editor.connection.vendor == 'postgresql':
+        for field in SEARCH_FIELDS:
+            schema_editor.execute('DROP INDEX exams_word_%s_trgm' % field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0029_word_card_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
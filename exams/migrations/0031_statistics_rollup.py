@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 13:30
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_rollups(apps, schema_editor):
+    from collections import Counter
+    from datetime import timedelta
+
+    Statistics = apps.get_model('exams', 'Statistics')
+    StatisticsRollup = apps.get_model('exams', 'StatisticsRollup')
+
+    aware_counts = Counter()
+    forgot_counts = Counter()
+    for user_id, book_id, exam_type, exam_date, step, aware_cnt, forgot_cnt in \
+            Statistics.objects.values_list('user_id', 'book_id', 'type', 'exam_date', 'step',
+                                           'aware_cnt', 'forgot_cnt').iterator():
+        for period, start_date in (('w', exam_date - timedelta(days=exam_date.weekday())),
+                                   ('m', exam_date.replace(day=1))):
+            key = (user_id, book_id, exam_type, period, start_date, step)
+            aware_counts[key] += aware_cnt
+            forgot_counts[key] += forgot_cnt
+
+    StatisticsRollup.objects.bulk_create([
+        StatisticsRollup(aware_cnt=aware_counts[key], forgot_cnt=forgot_counts[key],
+                         **dict(zip(('user_id', 'book_id', 'type', 'period', 'start_date', 'step'), key)))
+        for key in aware_counts
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0030_word_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatisticsRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('w', 'Word'), ('m', 'Meaning')], max_length=1)),
+                ('period', models.CharField(choices=[('w', 'Week'), ('m', 'Month')], max_length=1)),
+                ('start_date', models.DateField()),
+                ('step', models.SmallIntegerField()),
+                ('aware_cnt', models.IntegerField(default=0)),
+                ('forgot_cnt', models.IntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.User')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StepCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('w', 'Word'), ('m', 'Meaning')], max_length=1)),
+                ('step', models.SmallIntegerField()),
+                ('memory_cnt', models.IntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.Book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.User')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='statistics',
+            index_together=set([('user', 'book', 'type', 'exam_date')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='stepcounter',
+            unique_together=set([('user', 'book', 'type', 'step')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='statisticsrollup',
+            unique_together=set([('user', 'book', 'type', 'period', 'start_date', 'step')]),
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 14:26
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0032_user_auth_user'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='statistics',
+            index_together=set([('user', 'book', 'type', 'exam_date'), ('user', 'book', 'exam_date', 'type', 'step', 'status')]),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 14:28
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0033_statistics_admin_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='memory',
+            name='modify_dt',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
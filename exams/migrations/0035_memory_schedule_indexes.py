@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.13 on 2026-10-18 14:38
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0034_memory_modify_dt_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='memory',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='exams.User'),
+        ),
+        migrations.AlterIndexTogether(
+            name='memory',
+            index_together=set([('user', 'book', 'type', 'unlock_dt'), ('user', 'book', 'type', 'group_level', 'unlock_dt'), ('user', 'book', 'type', 'word')]),
+        ),
+    ]
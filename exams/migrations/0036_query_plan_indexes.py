@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0035_memory_schedule_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='memory',
+            name='book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='exams.Book'),
+        ),
+        migrations.AlterIndexTogether(
+            name='memory',
+            index_together=set([('user', 'book', 'type', 'word'), ('book', 'user', 'type'), ('user', 'book', 'type', 'group_level', 'unlock_dt'), ('user', 'book', 'type', 'unlock_dt')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='statistics',
+            index_together=set([('user', 'book', 'type', 'exam_date')]),
+        ),
+        # admin 목록은 (user, book, -exam_date, type, step, status, -pk) 순서로 읽는다.
+        # 앞의 여섯 칸이 유니크해야 뒤에 붙는 -pk 정렬도 인덱스만으로 끝난다
+        migrations.RunSQL(
+            ['CREATE UNIQUE INDEX exams_statistics_admin_order ON exams_statistics '
+             '(user_id, book_id, exam_date DESC, type, step, status)'],
+            ['DROP INDEX exams_statistics_admin_order'],
+        ),
+    ]
@@ -1,8 +1,14 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class User(models.Model):
     name = models.CharField(max_length=32, unique=True)
+    auth_user = models.OneToOneField(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
     create_dt = models.DateTimeField(auto_now_add=True)
     modify_dt = models.DateTimeField(auto_now=True)
 
@@ -11,12 +17,43 @@ class User(models.Model):
         return self.name
 
 
+class SchedulerTypes:
+    Leitner = 'leitner'
+    SM2 = 'sm2'
+
+SCHEDULER_TYPES = (
+    ('leitner', 'Leitner'),
+    ('sm2', 'SM-2'),
+)
+
+
 class Book(models.Model):
     title = models.CharField(max_length=64, unique=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    has_pending_words = models.BooleanField(default=False)
+    scheduler = models.CharField(max_length=16, choices=SCHEDULER_TYPES, default=SchedulerTypes.Leitner)
+    scheduler_params = models.TextField(blank=True)
     create_dt = models.DateTimeField(auto_now_add=True)
     modify_dt = models.DateTimeField(auto_now=True)
 
+    def clean(self):
+        if self.scheduler_params:
+            try:
+                params = json.loads(self.scheduler_params)
+            except ValueError:
+                raise ValidationError({'scheduler_params': 'Must be a JSON object.'})
+            if not isinstance(params, dict):
+                raise ValidationError({'scheduler_params': 'Must be a JSON object.'})
+        else:
+            params = {}
+
+        # scheduler가 Book을 import하므로 여기서 불러온다
+        from exams.scheduler import check_scheduler_params
+        try:
+            check_scheduler_params(self.scheduler, params)
+        except ValueError as e:
+            raise ValidationError({'scheduler_params': str(e)})
+
     def __str__(self):
 
         return self.title
@@ -28,6 +65,7 @@ class Word(models.Model):
     pronunciation = models.CharField(max_length=256, blank=True)
     meaning = models.CharField(max_length=256)
     naver_link = models.CharField(max_length=256, blank=True)
+    card_html = models.TextField(blank=True, editable=False)
     create_dt = models.DateTimeField(auto_now_add=True)
     modify_dt = models.DateTimeField(auto_now=True)
     related = models.ManyToManyField("self", symmetrical=True, blank=True)
@@ -55,6 +93,15 @@ class Word(models.Model):
         return '%s:%s:%s' % (self.word, self.pronunciation, self.meaning)
 
 
+class PendingWord(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    word = models.ForeignKey(Word, on_delete=models.CASCADE)
+    create_dt = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.book.title + ':' + self.word.word
+
+
 class MemoryTypes:
     Word = 'w'
     Meaning = 'm'
@@ -78,24 +125,31 @@ MEMORY_STATUS = (
 
 
 class Memory(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
-    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    # (user, word, type) 유니크 인덱스가 user로 시작하므로 따로 두지 않는다
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    # (book, user, type) 인덱스가 book으로 시작하므로 따로 두지 않는다
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, db_index=False)
     word = models.ForeignKey(Word, on_delete=models.CASCADE)
     type = models.CharField(max_length=1, choices=MEMORY_TYPES)
     step = models.SmallIntegerField(default=0)
-    unlock_dt = models.DateTimeField(auto_now_add=True)
+    unlock_dt = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=1, choices=MEMORY_STATUS, default=MemoryStatus.Unknown)
     group_level = models.SmallIntegerField(default=0)
     aware_cnt = models.SmallIntegerField(default=0)
     forgot_cnt = models.SmallIntegerField(default=0)
     create_dt = models.DateTimeField(auto_now_add=True)
-    modify_dt = models.DateTimeField(auto_now=True)
+    # admin 목록의 정렬 순서
+    modify_dt = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('user', 'word', 'type')
         index_together = (
-            ('user', 'book', 'type', 'create_dt'),
-            ('user', 'book', 'type', 'unlock_dt')
+            # 아직 Memory가 없는 단어를 찾을 때 인덱스만 읽는다
+            ('user', 'book', 'type', 'word'),
+            ('user', 'book', 'type', 'unlock_dt'),
+            ('user', 'book', 'type', 'group_level', 'unlock_dt'),
+            # 새 단어가 들어온 책을 공부중인 (user, type) 목록
+            ('book', 'user', 'type'),
         )
 
     def __str__(self):
@@ -116,3 +170,74 @@ class Statistics(models.Model):
 
     class Meta:
         unique_together = ('user', 'book', 'type', 'step', 'status', 'exam_date')
+        index_together = (
+            ('user', 'book', 'type', 'exam_date'),
+        )
+        # admin 목록의 정렬 순서는 exam_date만 내림차순이라 migration 0036에서 RunSQL로 인덱스를 만든다
+
+
+class RollupPeriods:
+    Week = 'w'
+    Month = 'm'
+
+ROLLUP_PERIODS = (
+    ('w', 'Week'),
+    ('m', 'Month'),
+)
+
+
+class StatisticsRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    type = models.CharField(max_length=1, choices=MEMORY_TYPES)
+    period = models.CharField(max_length=1, choices=ROLLUP_PERIODS)
+    start_date = models.DateField()
+    step = models.SmallIntegerField()
+    aware_cnt = models.IntegerField(default=0)
+    forgot_cnt = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'book', 'type', 'period', 'start_date', 'step')
+
+
+class StepCounter(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    type = models.CharField(max_length=1, choices=MEMORY_TYPES)
+    step = models.SmallIntegerField()
+    memory_cnt = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'book', 'type', 'step')
+
+
+class DueCounter(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    type = models.CharField(max_length=1, choices=MEMORY_TYPES)
+    due_cnt = models.IntegerField(default=0)
+    count_dt = models.DateTimeField()
+    create_dt = models.DateTimeField(auto_now_add=True)
+    modify_dt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'book', 'type')
+
+
+class UnlockBucket(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    type = models.CharField(max_length=1, choices=MEMORY_TYPES)
+    bucket_dt = models.DateTimeField()
+    unlock_cnt = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'book', 'type', 'bucket_dt')
+
+
+class GradeEvent(models.Model):
+    event_id = models.CharField(max_length=64, unique=True)
+    memory = models.ForeignKey(Memory, on_delete=models.CASCADE)
+    result = models.CharField(max_length=1, choices=MEMORY_STATUS)
+    answered_dt = models.DateTimeField()
+    create_dt = models.DateTimeField(auto_now_add=True)
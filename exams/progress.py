@@ -0,0 +1,157 @@
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils.dateparse import parse_date, parse_datetime
+
+from exams.counters import rebuild_rollups, rebuild_step_counters
+from exams.duecount import rebuild_counters
+from exams.grading import BULK_UPDATE_SIZE, bulk_save_memories
+from exams.models import Book, Memory, Statistics, User, Word
+
+PROGRESS_BATCH_SIZE = 500
+
+MEMORY_FIELDS = ('type', 'step', 'unlock_dt', 'status', 'group_level', 'aware_cnt', 'forgot_cnt', 'modify_dt')
+STATISTICS_FIELDS = ('exam_date', 'type', 'step', 'status', 'aware_cnt', 'forgot_cnt')
+STATISTICS_KEY_FIELDS = ('book_id', 'exam_date', 'type', 'step', 'status')
+
+
+def __iter_rows(queryset, fields: tuple):
+    # pk 순서로 끊어 읽어서 행 수와 상관없이 메모리를 일정하게 쓴다
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).order_by('pk')
+                            .values_list('pk', *fields)[:PROGRESS_BATCH_SIZE])
+        if not rows:
+            return
+        for row in rows:
+            yield row[1:]
+        last_pk = rows[-1][0]
+
+
+def __to_json(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def export_progress(user: User, fileobj) -> dict:
+    stats = {'memories': 0, 'statistics': 0}
+
+    fields = ('book__title', 'word__word') + MEMORY_FIELDS
+    for row in __iter_rows(Memory.objects.filter(user=user), fields):
+        record = dict(zip(('book', 'word') + MEMORY_FIELDS, map(__to_json, row)), kind='memory')
+        fileobj.write(json.dumps(record, ensure_ascii=False) + '\n')
+        stats['memories'] += 1
+
+    fields = ('book__title', ) + STATISTICS_FIELDS
+    for row in __iter_rows(Statistics.objects.filter(user=user), fields):
+        record = dict(zip(('book', ) + STATISTICS_FIELDS, map(__to_json, row)), kind='statistics')
+        fileobj.write(json.dumps(record, ensure_ascii=False) + '\n')
+        stats['statistics'] += 1
+
+    return stats
+
+
+def __get_books(titles: set, books: dict) -> dict:
+    missing = titles.difference(books.keys())
+    if missing:
+        books.update(Book.objects.filter(title__in=missing).values_list('title', 'pk'))
+    return books
+
+
+def __import_memories(user: User, records: list, books: dict, stats: dict):
+    __get_books(set(record['book'] for record in records), books)
+
+    word_ids = {}
+    for book_title in set(record['book'] for record in records if record['book'] in books):
+        words = [record['word'] for record in records if record['book'] == book_title]
+        for word, word_id in Word.objects.filter(book_id=books[book_title], word__in=words) \
+                                         .values_list('word', 'pk'):
+            word_ids[(book_title, word)] = word_id
+
+    rows = {}
+    for record in records:
+        word_id = word_ids.get((record['book'], record['word']))
+        if word_id is None:
+            stats['skipped'] += 1
+            continue
+        rows[(word_id, record['type'])] = (books[record['book']], record)
+
+    def get_existing():
+        return dict(((word_id, exam_type), pk) for pk, word_id, exam_type in
+                    Memory.objects.filter(user=user, word_id__in=set(word_id for word_id, _ in rows))
+                                  .values_list('pk', 'word_id', 'type'))
+
+    # 없는 Memory를 먼저 만들고, 모든 행의 값을 한번에 덮어쓴다
+    existing = get_existing()
+    Memory.objects.bulk_create([Memory(user=user, book_id=book_id, word_id=word_id, type=exam_type)
+                                for (word_id, exam_type), (book_id, _) in rows.items()
+                                if (word_id, exam_type) not in existing])
+    stats['memories'] += len(rows)
+    existing = get_existing()
+
+    memories = []
+    for key, (book_id, record) in rows.items():
+        memory = Memory(pk=existing[key], user=user, book_id=book_id, word_id=key[0])
+        for field in MEMORY_FIELDS:
+            setattr(memory, field, record[field])
+        memory.unlock_dt = parse_datetime(record['unlock_dt'])
+        memory.modify_dt = parse_datetime(record['modify_dt'])
+        memories.append(memory)
+    bulk_save_memories(memories)
+
+
+def __import_statistics(user: User, records: list, books: dict, stats: dict):
+    __get_books(set(record['book'] for record in records), books)
+
+    rows = {}
+    for record in records:
+        if record['book'] not in books:
+            stats['skipped'] += 1
+            continue
+        key = (books[record['book']], parse_date(record['exam_date']), record['type'], record['step'],
+               record['status'])
+        rows[key] = (record['aware_cnt'], record['forgot_cnt'])
+    if not rows:
+        return
+
+    existing = dict((row[1:], row[0]) for row in
+                    Statistics.objects.filter(user=user, book_id__in=set(key[0] for key in rows),
+                                              exam_date__in=set(key[1] for key in rows))
+                                      .values_list('pk', *STATISTICS_KEY_FIELDS))
+
+    # 없는 행은 한번에 만들고, 있는 행은 한번에 덮어쓴다
+    Statistics.objects.bulk_create([
+        Statistics(user=user, aware_cnt=aware_cnt, forgot_cnt=forgot_cnt, **dict(zip(STATISTICS_KEY_FIELDS, key)))
+        for key, (aware_cnt, forgot_cnt) in rows.items() if key not in existing
+    ])
+    updates = [(existing[key], counts) for key, counts in rows.items() if key in existing]
+    for offset in range(0, len(updates), BULK_UPDATE_SIZE):
+        chunk = updates[offset:offset + BULK_UPDATE_SIZE]
+        Statistics.objects.filter(pk__in=[pk for pk, _ in chunk]).update(
+            aware_cnt=Case(*[When(pk=pk, then=Value(aware_cnt)) for pk, (aware_cnt, _) in chunk],
+                           output_field=IntegerField()),
+            forgot_cnt=Case(*[When(pk=pk, then=Value(forgot_cnt)) for pk, (_, forgot_cnt) in chunk],
+                            output_field=IntegerField()))
+    stats['statistics'] += len(rows)
+
+
+def import_progress(user: User, fileobj) -> dict:
+    stats = {'memories': 0, 'statistics': 0, 'skipped': 0}
+    books = {}
+    lines = (json.loads(line) for line in fileobj if line.strip())
+
+    while True:
+        records = list(islice(lines, PROGRESS_BATCH_SIZE))
+        if not records:
+            break
+
+        with transaction.atomic():
+            __import_memories(user, [record for record in records if record['kind'] == 'memory'], books, stats)
+            __import_statistics(user, [record for record in records if record['kind'] == 'statistics'],
+                                books, stats)
+
+    rebuild_counters(user=user)
+    rebuild_step_counters(user=user)
+    rebuild_rollups(user=user)
+    return stats
@@ -0,0 +1,211 @@
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from exams.models import Book, Memory, SchedulerTypes
+
+RESCHEDULE_BATCH_SIZE = 400
+
+# scheduler_params를 저장하기 전에 다음 시험 시각을 계산해 보는 step 수
+CHECK_STEPS = 20
+
+# 더 이상 시험 보지 않는 카드의 unlock_dt
+NEVER = datetime(9999, 1, 1, tzinfo=timezone.utc)
+
+
+def update_unlock_dts(pks: list, unlock_dts: list):
+    Memory.objects.filter(pk__in=pks).update(unlock_dt=Case(
+        *[When(pk=pk, then=Value(unlock_dt)) for pk, unlock_dt in zip(pks, unlock_dts)],
+        output_field=DateTimeField()))
+
+
+class Scheduler:
+    defaults = {
+        'offset_hours': 8,
+        'relearn_hours': 16,
+    }
+
+    def __init__(self, params: dict = None):
+        unknown = set(params or {}) - set(self.defaults)
+        if unknown:
+            raise ValueError('Unknown scheduler params: %s' % ', '.join(sorted(unknown)))
+        self.params = dict(self.defaults, **(params or {}))
+        self.check_params()
+        self.offset = timedelta(hours=self.params['offset_hours'])
+        self.relearn_interval = timedelta(hours=self.params['relearn_hours'])
+
+    def check_number(self, name: str, minimum: float = 0):
+        value = self.params[name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+            raise ValueError('%s must be a number of at least %s.' % (name, minimum))
+
+    def check_days(self, name: str):
+        days = self.params[name]
+        if not isinstance(days, list) or not days or \
+                any(isinstance(day, bool) or not isinstance(day, (int, float)) or day <= 0 for day in days):
+            raise ValueError('%s must be a list of positive days.' % name)
+
+    def check_params(self):
+        self.check_number('offset_hours')
+        self.check_number('relearn_hours')
+
+    def get_interval(self, step: int, lapses: int) -> timedelta:
+        # None이면 다 외운 카드로 본다
+        raise NotImplementedError
+
+    def get_unlock_dts(self, steps: list, lapses: list, reviewed_dts: list) -> list:
+        intervals = {}
+        unlock_dts = []
+        for step, lapse, reviewed_dt in zip(steps, lapses, reviewed_dts):
+            if (step, lapse) not in intervals:
+                intervals[(step, lapse)] = self.get_interval(step, lapse)
+            interval = intervals[(step, lapse)]
+            unlock_dts.append(NEVER if interval is None else reviewed_dt + interval - self.offset)
+        return unlock_dts
+
+    def get_unlock_dt(self, step: int, lapses: int, now: datetime) -> datetime:
+        return self.get_unlock_dts([step], [lapses], [now])[0]
+
+    def get_relearn_dt(self, now: datetime) -> datetime:
+        return now + self.relearn_interval
+
+    def reschedule(self, memories) -> int:
+        # 마지막 채점 시각부터 다시 계산해서 chunk마다 UPDATE 한번으로 반영한다
+        memories = memories.filter(step__gt=0, group_level=0).order_by('pk')
+        updated = 0
+        last_pk = 0
+        while True:
+            rows = list(memories.filter(pk__gt=last_pk)
+                                .values_list('pk', 'step', 'forgot_cnt', 'modify_dt')[:RESCHEDULE_BATCH_SIZE])
+            if not rows:
+                return updated
+
+            pks, steps, lapses, reviewed_dts = zip(*rows)
+            update_unlock_dts(pks, self.get_unlock_dts([step - 1 for step in steps], lapses, reviewed_dts))
+
+            updated += len(rows)
+            last_pk = pks[-1]
+
+
+class LeitnerScheduler(Scheduler):
+    defaults = dict(Scheduler.defaults, intervals=[1, 7, 28, 28*3])
+
+    def check_params(self):
+        super().check_params()
+        self.check_days('intervals')
+
+    def get_interval(self, step: int, lapses: int) -> timedelta:
+        intervals = self.params['intervals']
+        if step >= len(intervals):
+            return None
+        return timedelta(days=intervals[step])
+
+
+class SM2Scheduler(Scheduler):
+    defaults = dict(Scheduler.defaults, first_intervals=[1, 6], ease=2.5, min_ease=1.3, lapse_penalty=0.2,
+                    max_interval=3650)
+
+    def check_params(self):
+        super().check_params()
+        self.check_days('first_intervals')
+        self.check_number('min_ease', 1)
+        self.check_number('ease', self.params['min_ease'])
+        self.check_number('lapse_penalty')
+        self.check_number('max_interval', 1)
+
+    def get_interval(self, step: int, lapses: int) -> timedelta:
+        first_intervals = self.params['first_intervals']
+        if step < len(first_intervals):
+            return timedelta(days=first_intervals[step])
+
+        # 틀린 횟수만큼 ease가 줄어든다
+        ease = max(self.params['min_ease'], self.params['ease'] - self.params['lapse_penalty'] * lapses)
+        days = first_intervals[-1] * ease ** (step - len(first_intervals) + 1)
+        if days > self.params['max_interval']:
+            return None
+        return timedelta(days=days)
+
+
+SCHEDULERS = {
+    SchedulerTypes.Leitner: LeitnerScheduler,
+    SchedulerTypes.SM2: SM2Scheduler,
+}
+
+
+def check_scheduler_params(scheduler_type: str, params: dict):
+    # 채점할 때 실패하지 않도록 앞쪽 step들의 다음 시험 시각을 미리 계산해 본다
+    if scheduler_type not in SCHEDULERS:
+        raise ValueError('Unknown scheduler: %s' % scheduler_type)
+    scheduler = SCHEDULERS[scheduler_type](params)
+    now = timezone.now()
+    try:
+        scheduler.get_unlock_dts(list(range(CHECK_STEPS)), [0] * CHECK_STEPS, [now] * CHECK_STEPS)
+        scheduler.get_relearn_dt(now)
+    except OverflowError:
+        raise ValueError('Intervals are too long.')
+
+
+def get_scheduler(book: Book) -> Scheduler:
+    params = json.loads(book.scheduler_params) if book.scheduler_params else {}
+    return SCHEDULERS[book.scheduler](params)
+
+
+def __after(memories, group_level: int, unlock_dt: datetime, pk: int):
+    fields = [Memory._meta.get_field('group_level'), Memory._meta.get_field('unlock_dt'), Memory._meta.pk]
+    quote = connection.ops.quote_name
+    columns = ', '.join('%s.%s' % (quote(Memory._meta.db_table), quote(field.column)) for field in fields)
+    return memories.extra(
+        where=['(%s) > (%%s, %%s, %%s)' % columns],
+        params=[field.get_db_prep_value(value, connection)
+                for field, value in zip(fields, (group_level, unlock_dt, pk))])
+
+
+def spread_due(memories, now: datetime, days: int, cap: int) -> tuple:
+    # 오래 기다린 카드부터 하루에 cap개를 넘지 않게 앞으로 days일 동안 나눠 놓는다.
+    # days일에 다 들어가지 않는 카드는 그대로 두고, (옮긴 카드 수, 남겨둔 카드 수)를 돌려준다
+    if days < 1 or cap < 1:
+        raise ValueError('days and cap must be at least 1.')
+
+    memories = memories.filter(unlock_dt__lte=now).order_by('group_level', 'unlock_dt', 'pk')
+    total = memories.count()
+    per_day = min(cap, -(-total // days))
+    window = per_day * days
+
+    # (group_level, unlock_dt, pk) 순서로 chunk씩 읽는다. 옮긴 카드는 due에서 빠지므로 커서만 넘기면 된다
+    moved = 0
+    index = 0
+    rows = list(memories.values_list('pk', 'group_level', 'unlock_dt')[:RESCHEDULE_BATCH_SIZE])
+    while rows and index < window:
+        day_pks = defaultdict(list)
+        for pk, _, _ in rows:
+            if per_day <= index < window:
+                day_pks[index // per_day].append(pk)
+            index += 1
+        for day, pks in day_pks.items():
+            Memory.objects.filter(pk__in=pks).update(unlock_dt=now + timedelta(days=day))
+            moved += len(pks)
+
+        last_pk, last_group_level, last_unlock_dt = rows[-1]
+        rows = list(__after(memories, last_group_level, last_unlock_dt, last_pk)
+                    .values_list('pk', 'group_level', 'unlock_dt')[:RESCHEDULE_BATCH_SIZE])
+    return moved, max(0, total - window)
+
+
+def shift(memories, offset: timedelta) -> int:
+    memories = memories.filter(unlock_dt__lt=NEVER).order_by('pk')
+    shifted = 0
+    last_pk = 0
+    while True:
+        rows = list(memories.filter(pk__gt=last_pk).values_list('pk', 'unlock_dt')[:RESCHEDULE_BATCH_SIZE])
+        if not rows:
+            return shifted
+
+        pks, unlock_dts = zip(*rows)
+        update_unlock_dts(pks, [unlock_dt + offset for unlock_dt in unlock_dts])
+
+        shifted += len(rows)
+        last_pk = pks[-1]
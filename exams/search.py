@@ -0,0 +1,145 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+from exams.models import Book, Word
+
+SEARCH_TABLE = 'exams_word_search'
+INDEX_BATCH_SIZE = 500
+
+# trigram 토크나이저는 세 글자 이상부터 색인을 탄다
+MIN_MATCH_LENGTH = 3
+
+KATAKANA = re.compile('[ァ-ヶ]')
+ROMAJI_TERM = re.compile('[a-z]+$')
+
+ROMAJI_ROWS = {
+    '': 'あいうえお', 'k': 'かきくけこ', 's': 'さしすせそ', 't': 'たちつてと', 'n': 'なにぬねの',
+    'h': 'はひふへほ', 'm': 'まみむめも', 'r': 'らりるれろ', 'g': 'がぎぐげご', 'z': 'ざじずぜぞ',
+    'd': 'だぢづでど', 'b': 'ばびぶべぼ', 'p': 'ぱぴぷぺぽ',
+}
+ROMAJI = dict((consonant + vowel, kana)
+              for consonant, row in ROMAJI_ROWS.items() for vowel, kana in zip('aiueo', row))
+ROMAJI.update({
+    'ya': 'や', 'yu': 'ゆ', 'yo': 'よ', 'wa': 'わ', 'wo': 'を', 'nn': 'ん',
+    'shi': 'し', 'chi': 'ち', 'tsu': 'つ', 'fu': 'ふ', 'ji': 'じ',
+})
+for consonant, kana in (('ky', 'き'), ('sh', 'し'), ('ch', 'ち'), ('ny', 'に'), ('hy', 'ひ'), ('my', 'み'),
+                        ('ry', 'り'), ('gy', 'ぎ'), ('j', 'じ'), ('by', 'び'), ('py', 'ぴ')):
+    for vowel, small in (('a', 'ゃ'), ('u', 'ゅ'), ('o', 'ょ')):
+        ROMAJI[consonant + vowel] = kana + small
+
+
+def normalize(text: str) -> str:
+    # 전각/반각을 맞추고 가타카나는 히라가나로 바꾼다
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return KATAKANA.sub(lambda match: chr(ord(match.group()) - 0x60), text)
+
+
+def romaji_to_hiragana(text: str) -> str:
+    result = []
+    i = 0
+    while i < len(text):
+        if text[i] == text[i + 1:i + 2] and text[i] not in 'aiueon':
+            result.append('っ')
+            i += 1
+            continue
+        for size in (3, 2, 1):
+            if text[i:i + size] in ROMAJI:
+                result.append(ROMAJI[text[i:i + size]])
+                i += size
+                break
+        else:
+            if text[i] != 'n':
+                return ''
+            result.append('ん')
+            i += 1
+    return ''.join(result)
+
+
+def get_search_text(word: str, pronunciation: str, meaning: str) -> str:
+    return normalize('\n'.join((word, pronunciation, meaning)))
+
+
+def has_search_index() -> bool:
+    # FTS5 색인은 SQLite에만 만든다. 다른 DB는 trigram 색인이 걸린 icontains를 쓴다
+    return connection.vendor == 'sqlite'
+
+
+def index_words(word_ids):
+    if not has_search_index():
+        return
+    word_ids = list(word_ids)
+    with connection.cursor() as cursor:
+        for offset in range(0, len(word_ids), INDEX_BATCH_SIZE):
+            chunk = word_ids[offset:offset + INDEX_BATCH_SIZE]
+            cursor.execute('DELETE FROM %s WHERE rowid IN (%s)' % (SEARCH_TABLE, ', '.join(['%s'] * len(chunk))),
+                           chunk)
+            rows = Word.objects.filter(pk__in=chunk).values_list('pk', 'word', 'pronunciation', 'meaning')
+            cursor.executemany('INSERT INTO %s (rowid, content) VALUES (%%s, %%s)' % SEARCH_TABLE,
+                               [(pk, get_search_text(*texts)) for pk, *texts in rows])
+
+
+def unindex_words(word_ids):
+    if not has_search_index():
+        return
+    word_ids = list(word_ids)
+    with connection.cursor() as cursor:
+        for offset in range(0, len(word_ids), INDEX_BATCH_SIZE):
+            chunk = word_ids[offset:offset + INDEX_BATCH_SIZE]
+            cursor.execute('DELETE FROM %s WHERE rowid IN (%s)' % (SEARCH_TABLE, ', '.join(['%s'] * len(chunk))),
+                           chunk)
+
+
+def index_book(book: Book) -> int:
+    indexed = 0
+    last_pk = 0
+    while True:
+        word_ids = list(book.word_set.filter(pk__gt=last_pk).order_by('pk')
+                                     .values_list('pk', flat=True)[:INDEX_BATCH_SIZE])
+        if not word_ids:
+            return indexed
+        index_words(word_ids)
+        indexed += len(word_ids)
+        last_pk = word_ids[-1]
+
+
+def __get_terms(query: str) -> list:
+    terms = []
+    for term in normalize(query).split():
+        # 로마자로 쓴 검색어는 히라가나로 바꾼 것도 같이 찾는다
+        kana = romaji_to_hiragana(term) if ROMAJI_TERM.match(term) else ''
+        terms.append([term, kana] if kana and kana != term else [term])
+    return terms
+
+
+def __match_term(term: str) -> tuple:
+    if len(term) >= MIN_MATCH_LENGTH:
+        return '%s.id IN (SELECT rowid FROM %s WHERE content MATCH %%s)' % (Word._meta.db_table, SEARCH_TABLE), \
+            '"%s"' % term.replace('"', '""')
+    # 짧은 검색어는 색인을 못 타므로 결과를 모두 만들지 않고 행마다 확인한다
+    return "EXISTS (SELECT 1 FROM %s WHERE rowid = %s.id AND content LIKE %%s ESCAPE '\\')" \
+        % (SEARCH_TABLE, Word._meta.db_table), '%%%s%%' % re.sub(r'([\\%_])', r'\\\1', term)
+
+
+def search_words(queryset, query: str):
+    terms = __get_terms(query)
+    if not terms:
+        return queryset
+
+    if not has_search_index():
+        condition = Q()
+        for alternatives in terms:
+            term = alternatives[0]
+            condition &= Q(word__icontains=term) | Q(pronunciation__icontains=term) | Q(meaning__icontains=term)
+        return queryset.filter(condition)
+
+    where = []
+    params = []
+    for alternatives in terms:
+        matches = [__match_term(term) for term in alternatives]
+        where.append('(%s)' % ' OR '.join([sql for sql, _ in matches]))
+        params.extend([param for _, param in matches])
+    return queryset.extra(where=where, params=params)
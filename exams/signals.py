@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from exams.cards import RELATION_FIELDS, get_neighbor_ids, rebuild_cards
+from exams.counters import record_steps
+from exams.duecount import get_memory_key, record_moves
+from exams.models import Memory, Word
+from exams.search import index_words, unindex_words
+from exams.sync import mark_pending
+from exams.writer import apply_pragmas
+
+
+@receiver(post_save, sender=Word)
+def queue_new_word(sender, instance: Word, created: bool, raw: bool = False, **kwargs):
+    if created and not raw:
+        mark_pending(instance.book_id, [instance.pk])
+
+
+@receiver(post_save, sender=Word)
+def rebuild_word_card(sender, instance: Word, raw: bool = False, **kwargs):
+    if not raw:
+        # 이 단어의 링크는 관련어들의 카드에도 들어간다
+        rebuild_cards(get_neighbor_ids([instance.pk]) | {instance.pk})
+
+
+@receiver(pre_delete, sender=Word)
+def remember_neighbors(sender, instance: Word, **kwargs):
+    instance._neighbor_ids = get_neighbor_ids([instance.pk])
+
+
+@receiver(post_delete, sender=Word)
+def rebuild_neighbor_cards(sender, instance: Word, **kwargs):
+    rebuild_cards(getattr(instance, '_neighbor_ids', set()))
+
+
+@receiver(post_save, sender=Word)
+def index_word(sender, instance: Word, raw: bool = False, **kwargs):
+    if not raw:
+        index_words([instance.pk])
+
+
+@receiver(post_delete, sender=Word)
+def unindex_word(sender, instance: Word, **kwargs):
+    unindex_words([instance.pk])
+
+
+@receiver(pre_delete, sender=Memory)
+def uncount_memory(sender, instance: Memory, **kwargs):
+    # Word, Book, User를 지워서 같이 지워질 때도 불린다. 모든 pre_delete가 지우기 전에 불리므로
+    # 같이 지워질 카운터도 아직 남아 있어서 없는 행을 새로 만들지 않는다
+    key = get_memory_key(instance)
+    record_moves([(key, instance.unlock_dt, None)])
+    record_steps([(key, instance.step, None)])
+
+
+def rebuild_related_cards(sender, instance, action: str, reverse: bool, model, pk_set: set, **kwargs):
+    if action == 'pre_clear':
+        instance._cleared_ids = get_neighbor_ids([instance.pk])
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_cleared_ids', set())
+        word_ids = set(pk_set or ()) | {instance.pk}
+        # symmetrical 관계는 반대 방향 행이 signal 이후에 들어가므로 커밋된 후에 만든다
+        transaction.on_commit(lambda: rebuild_cards(word_ids))
+
+
+for field in RELATION_FIELDS:
+    m2m_changed.connect(rebuild_related_cards, sender=getattr(Word, field).through,
+                        dispatch_uid='rebuild_%s_cards' % field)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection)
@@ -0,0 +1,63 @@
+(function ($) {
+    $(function () {
+        var wordId = (location.pathname.match(/\/(\d+)\/(change\/)?$/) || [])[1] || 0;
+
+        $('select.word-autocomplete').each(function () {
+            var select = $(this).css('min-width', '20em');
+            var input = $('<input type="text" placeholder="Search words">').insertAfter(select);
+            var results = $('<ul class="word-autocomplete-results"></ul>').insertAfter(input);
+            var more = $('<a href="#">more</a>').hide().insertAfter(results);
+            var next = null;
+            var timer = null;
+
+            function load(after) {
+                $.getJSON(select.data('url'), {
+                    book: $('#id_book').val(),
+                    q: input.val(),
+                    exclude: wordId,
+                    after: after || 0
+                }, function (data) {
+                    if (!after) {
+                        results.empty();
+                    }
+                    $.each(data.results, function (i, word) {
+                        $('<li><a href="#"></a></li>').appendTo(results)
+                            .find('a').text(word.text).data('word', word);
+                    });
+                    next = data.next;
+                    more.toggle(next !== null);
+                });
+            }
+
+            input.on('input', function () {
+                clearTimeout(timer);
+                timer = setTimeout(function () {
+                    load(0);
+                }, 200);
+            });
+
+            more.on('click', function (e) {
+                e.preventDefault();
+                load(next);
+            });
+
+            results.on('click', 'a', function (e) {
+                e.preventDefault();
+                var word = $(this).data('word');
+                if (!select.find('option[value="' + word.id + '"]').length) {
+                    $('<option selected></option>').val(word.id).text(word.text).appendTo(select);
+                }
+                $(this).parent().remove();
+            });
+
+            // 선택된 단어는 더블클릭으로 뺀다
+            select.on('dblclick', 'option', function () {
+                $(this).remove();
+            });
+
+            select.closest('form').on('submit', function () {
+                select.find('option').prop('selected', true);
+            });
+        });
+    });
+})(django.jQuery);
@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.utils import timezone
+
+from exams.counters import record_steps
+from exams.duecount import record_moves
+from exams.models import Book, Memory, PendingWord, User
+
+SYNC_BATCH_SIZE = 500
+
+
+def get_unsynced_word_ids(user: User, book: Book, exam_type: str) -> list:
+    # 생성 시각과 상관없이 Memory가 없는 단어를 모두 찾는다
+    synced = Memory.objects.filter(user=user, book=book, type=exam_type).values('word_id')
+    return list(book.word_set.exclude(pk__in=synced).values_list('pk', flat=True))
+
+
+def sync_memories(user: User, book: Book, exam_type: str) -> int:
+    # 쓰기 잠금 안에서 불러야 동시에 처음 동기화하는 요청이 같은 행을 두번 넣지 않는다
+    word_ids = get_unsynced_word_ids(user, book, exam_type)
+    if not word_ids:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        for offset in range(0, len(word_ids), SYNC_BATCH_SIZE):
+            Memory.objects.bulk_create([
+                Memory(user=user, book=book, word_id=word_id, type=exam_type, unlock_dt=now)
+                for word_id in word_ids[offset:offset + SYNC_BATCH_SIZE]
+            ])
+        record_moves([((user.pk, book.pk, exam_type), None, now)] * len(word_ids))
+        record_steps([((user.pk, book.pk, exam_type), None, 0)] * len(word_ids))
+
+    return len(word_ids)
+
+
+def mark_pending(book_id: int, word_ids: list):
+    for offset in range(0, len(word_ids), SYNC_BATCH_SIZE):
+        PendingWord.objects.bulk_create([
+            PendingWord(book_id=book_id, word_id=word_id)
+            for word_id in word_ids[offset:offset + SYNC_BATCH_SIZE]
+        ])
+    Book.objects.filter(pk=book_id).update(has_pending_words=True)
+
+
+def get_subscriptions(book: Book) -> list:
+    # 이 책으로 공부중인 (user, type) 목록
+    return list(Memory.objects.filter(book=book).values_list('user_id', 'type').distinct())
+
+
+def process_pending(book: Book) -> int:
+    created = 0
+    now = timezone.now()
+
+    with transaction.atomic():
+        # 처리 도중에 추가되는 단어는 시그널이 다시 표시한다
+        Book.objects.filter(pk=book.pk).update(has_pending_words=False)
+        book.has_pending_words = False
+
+        pending = list(PendingWord.objects.filter(book=book).values_list('pk', 'word_id'))
+        subscriptions = get_subscriptions(book)
+
+        for offset in range(0, len(pending), SYNC_BATCH_SIZE):
+            chunk = pending[offset:offset + SYNC_BATCH_SIZE]
+            word_ids = set(word_id for _, word_id in chunk)
+
+            for user_id, exam_type in subscriptions:
+                synced = Memory.objects.filter(user_id=user_id, type=exam_type, word_id__in=word_ids) \
+                                       .values_list('word_id', flat=True)
+                memories = [Memory(user_id=user_id, book=book, word_id=word_id, type=exam_type, unlock_dt=now)
+                            for word_id in word_ids.difference(synced)]
+                Memory.objects.bulk_create(memories)
+                record_moves([((user_id, book.pk, exam_type), None, now)] * len(memories))
+                record_steps([((user_id, book.pk, exam_type), None, 0)] * len(memories))
+                created += len(memories)
+
+            PendingWord.objects.filter(pk__in=[pk for pk, _ in chunk]).delete()
+
+    return created
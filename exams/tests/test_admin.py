@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth.models import User as AuthUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from exams.benchmarks import seed_book, seed_due_memories, seed_user
+from exams.models import Memory, MemoryStatus, MemoryTypes, Statistics, Word
+
+
+class WordAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = AuthUser.objects.create_superuser('word-admin', '', 'password')
+        cls.book = seed_book(seed_user('word-admin'), 'word-admin', 250)
+        word_ids = list(cls.book.word_set.order_by('pk').values_list('pk', flat=True))
+        # 모든 단어를 다음 단어와 관련어, 유의어, 반의어로 잇는다
+        for field in ('related', 'synonym', 'antonym'):
+            through = getattr(Word, field).through
+            through.objects.bulk_create(
+                [through(from_word_id=a, to_word_id=b) for a, b in zip(word_ids, word_ids[1:])] +
+                [through(from_word_id=b, to_word_id=a) for a, b in zip(word_ids, word_ids[1:])])
+
+    def get_changelist(self, per_page: int) -> tuple:
+        self.client.force_login(self.superuser)
+        with mock.patch.object(admin.site._registry[Word], 'list_per_page', per_page), \
+                CaptureQueriesContext(connection) as context:
+            response = self.client.get('/admin/exams/word/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), per_page)
+        return response, len(context.captured_queries)
+
+    def test_query_count_per_page(self):
+        _, small_count = self.get_changelist(20)
+        response, large_count = self.get_changelist(200)
+        self.assertEqual(small_count, large_count)
+
+        # 관련어 칸은 그대로 그린다
+        word = response.context['cl'].result_list[1]
+        terms = ', '.join(term.word for term in word.related.all())
+        self.assertContains(response, '[관] %s / [유] %s / [반] %s' % (terms, terms, terms))
+
+
+class MemoryAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = AuthUser.objects.create_superuser('memory-admin', '', 'password')
+        user = seed_user('memory-admin')
+        seed_due_memories(user, seed_book(user, 'memory-admin', 300), MemoryTypes.Word)
+        # 가장 큰 id는 남기고 대부분 지워서 MAX(pk) 추정치가 실제보다 훨씬 크게 만든다
+        pks = Memory.objects.order_by('pk').values_list('pk', flat=True)
+        Memory.objects.filter(pk__lte=pks[249]).delete()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.superuser)
+
+    def get_changelist(self, query: str):
+        # 관계를 건너가는 정렬이면 keyset으로 찾을 수 없어서 OFFSET 페이지로 넘어간다
+        model_admin = admin.site._registry[Memory]
+        with mock.patch.object(model_admin, 'list_per_page', 20), \
+                mock.patch.object(model_admin, 'ordering', ['word__word']):
+            return self.client.get('/admin/exams/memory/' + query)
+
+    def test_offset_pages_follow_real_count(self):
+        response = self.get_changelist('')
+        self.assertEqual(response.status_code, 200)
+        cl = response.context['cl']
+        self.assertFalse(cl.keyset)
+        self.assertEqual(cl.paginator.num_pages, 3)
+        self.assertEqual(len(self.get_changelist('?p=2').context['cl'].result_list), 10)
+
+    def test_offset_page_out_of_range(self):
+        response = self.get_changelist('?p=5')
+        self.assertRedirects(response, '/admin/exams/memory/?e=1', fetch_redirect_response=False)
+
+
+class StatisticsAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = AuthUser.objects.create_superuser('statistics-admin', '', 'password')
+        users = [seed_user('statistics-admin-%d' % i) for i in range(2)]
+        books = [seed_book(users[0], 'statistics-admin-%d' % i, 1) for i in range(2)]
+        Statistics.objects.bulk_create([
+            Statistics(user=user, book=book, exam_date=date(2016, 1, 1) + timedelta(days=day), type=exam_type,
+                       step=step, status=status, aware_cnt=1)
+            for user in users for book in books for day in range(5)
+            for exam_type in (MemoryTypes.Word, MemoryTypes.Meaning) for step in range(2) for status in (MemoryStatus.Aware, MemoryStatus.Forgot)])
+        cls.ordered_ids = [
+            row.pk for row in sorted(Statistics.objects.all(), key=lambda row: (
+                row.user_id, row.book_id, -row.exam_date.toordinal(), row.type, row.step, row.status))]
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def get_page(self, query: str) -> tuple:
+        with mock.patch.object(admin.site._registry[Statistics], 'list_per_page', 30), \
+                CaptureQueriesContext(connection) as context:
+            response = self.client.get('/admin/exams/statistics/' + query)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl'], [query['sql'] for query in context.captured_queries]
+
+    def test_keyset_pages(self):
+        # exam_date만 내림차순이어도 OFFSET 없이 다음 페이지를 찾는다
+        seen = []
+        cl, _ = self.get_page('')
+        self.assertTrue(cl.keyset)
+        seen += [row.pk for row in cl.result_list]
+        while cl.next_after:
+            cl, queries = self.get_page('?after=%d' % cl.next_after)
+            seen += [row.pk for row in cl.result_list]
+            sql = [query for query in queries if 'FROM "exams_statistics"' in query and ' LIMIT ' in query][-1]
+            self.assertIn('"exams_statistics"."exam_date" < ', sql)
+            self.assertNotIn('OFFSET', sql)
+        self.assertEqual(seen, self.ordered_ids)
@@ -0,0 +1,103 @@
+import threading
+from collections import Counter
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from exams.benchmarks import seed_book, seed_user
+from exams.counters import StatisticsAccumulator, increase_statistics
+from exams.models import MemoryStatus, MemoryTypes, RollupPeriods, Statistics, StatisticsRollup
+
+THREADS = 8
+ANSWERS_PER_THREAD = 25
+
+
+def get_statistics_key(book) -> tuple:
+    return (book.owner_id, book.pk, timezone.localtime(timezone.now()).date(), MemoryTypes.Word, 0,
+            MemoryStatus.Aware)
+
+
+def hammer(target, *args):
+    # 모든 스레드가 동시에 시작해서 아직 없는 행을 같이 만들려고 한다
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def run():
+        try:
+            barrier.wait()
+            for _ in range(ANSWERS_PER_THREAD):
+                target(*args)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class ConcurrentStatisticsTest(TransactionTestCase):
+    def setUp(self):
+        self.book = seed_book(seed_user('counters'), 'counters', 1)
+        self.key = get_statistics_key(self.book)
+
+    def assertTotals(self, aware_cnt: int, forgot_cnt: int):
+        statistics = Statistics.objects.get()
+        self.assertEqual((statistics.aware_cnt, statistics.forgot_cnt), (aware_cnt, forgot_cnt))
+        for period in (RollupPeriods.Week, RollupPeriods.Month):
+            rollup = StatisticsRollup.objects.get(period=period)
+            self.assertEqual((rollup.aware_cnt, rollup.forgot_cnt), (aware_cnt, forgot_cnt))
+
+    def test_upsert(self):
+        errors = hammer(increase_statistics, Counter([self.key]), Counter([self.key, self.key]))
+        self.assertEqual(errors, [])
+        self.assertTotals(THREADS * ANSWERS_PER_THREAD, THREADS * ANSWERS_PER_THREAD * 2)
+
+    def test_accumulator(self):
+        accumulator = StatisticsAccumulator(interval=0.01)
+        errors = hammer(accumulator.add, Counter([self.key]), Counter())
+        self.assertEqual(errors, [])
+        accumulator.flush()
+        self.assertTotals(THREADS * ANSWERS_PER_THREAD, 0)
+
+
+class StatisticsAccumulatorTest(TestCase):
+    def setUp(self):
+        self.book = seed_book(seed_user('accumulator'), 'accumulator', 1)
+        self.key = get_statistics_key(self.book)
+        # flush는 테스트에서 직접 부른다
+        self.accumulator = StatisticsAccumulator(interval=3600)
+        self.accumulator.add(Counter([self.key, self.key]), Counter([self.key]))
+        self.accumulator.timer.cancel()
+
+    def test_flush(self):
+        self.accumulator.flush()
+        statistics = Statistics.objects.get()
+        self.assertEqual((statistics.aware_cnt, statistics.forgot_cnt), (2, 1))
+        self.assertEqual(self.accumulator.aware_counts, Counter())
+
+        # 비어 있을 때 flush해도 숫자가 바뀌지 않는다
+        self.accumulator.flush()
+        statistics.refresh_from_db()
+        self.assertEqual((statistics.aware_cnt, statistics.forgot_cnt), (2, 1))
+
+    def test_requeue_on_failure(self):
+        with mock.patch('exams.counters.increase_statistics', side_effect=OperationalError('database is locked')):
+            with self.assertRaises(OperationalError):
+                self.accumulator.flush()
+        self.assertFalse(Statistics.objects.exists())
+        self.assertEqual(self.accumulator.aware_counts, Counter([self.key, self.key]))
+        self.assertEqual(self.accumulator.forgot_counts, Counter([self.key]))
+
+        # 실패한 동안 들어온 숫자와 같이 한번만 반영한다
+        self.accumulator.add(Counter([self.key]), Counter())
+        self.accumulator.timer.cancel()
+        self.accumulator.flush()
+        statistics = Statistics.objects.get()
+        self.assertEqual((statistics.aware_cnt, statistics.forgot_cnt), (3, 1))
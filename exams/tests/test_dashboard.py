@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from exams.benchmarks import seed_book, seed_user
+from exams.dashboard import get_forecast
+from exams.models import Memory, MemoryTypes
+from exams.sync import sync_memories
+
+
+class ForecastTest(TestCase):
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2016, 5, 10, 12, 30))
+        self.today = timezone.localtime(self.now).date()
+        user = seed_user('forecast')
+        book = seed_book(user, 'forecast', 12)
+        self.key = (user.pk, book.pk, MemoryTypes.Word)
+        sync_memories(user, book, MemoryTypes.Word)
+
+        memory_ids = list(Memory.objects.order_by('pk').values_list('pk', flat=True))
+        # 이미 풀린 카드 3개, 이번 시간대에 마저 풀릴 카드 4개, 다음 시간대 2개, 내일 3개
+        for ids, unlock_dt in ((memory_ids[:3], self.now - timedelta(hours=1)),
+                               (memory_ids[3:7], self.now + timedelta(minutes=10)),
+                               (memory_ids[7:9], self.now + timedelta(hours=1)),
+                               (memory_ids[9:], self.now + timedelta(days=1))):
+            Memory.objects.filter(pk__in=ids).update(unlock_dt=unlock_dt)
+
+    def test_current_hour(self):
+        forecast = get_forecast(self.key, self.now, self.today)
+        self.assertEqual(forecast[0], {'date': self.today, 'due_cnt': 9})
+        self.assertEqual(forecast[1], {'date': self.today + timedelta(days=1), 'due_cnt': 3})
+        self.assertEqual(sum(day['due_cnt'] for day in forecast), Memory.objects.count())
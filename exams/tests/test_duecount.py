@@ -0,0 +1,86 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib import admin
+from django.test import TestCase
+from django.utils import timezone
+
+from exams.benchmarks import seed_book, seed_user
+from exams.counters import get_step_counts
+from exams.duecount import get_due_count
+from exams.grading import grade_memory
+from exams.models import Book, DueCounter, Memory, MemoryStatus, MemoryTypes, StepCounter, UnlockBucket, Word
+from exams.sync import sync_memories
+
+WORD_COUNT = 30
+
+
+class DueCounterTest(TestCase):
+    # 카운터를 만든 뒤에 카드가 바뀌어도 Memory를 직접 센 것과 같아야 한다
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.user = seed_user('due-counter')
+        self.book = seed_book(self.user, 'due-counter', WORD_COUNT)
+        self.key = (self.user.pk, self.book.pk, MemoryTypes.Word)
+        sync_memories(self.user, self.book, MemoryTypes.Word)
+        self.memories = Memory.objects.filter(user=self.user, book=self.book, type=MemoryTypes.Word)
+        self.assertCounted(self.now)
+
+    def assertCounted(self, now):
+        self.assertEqual(get_due_count(self.key, now), self.memories.filter(unlock_dt__lte=now).count())
+        self.assertEqual(get_step_counts(self.key), dict(Counter(self.memories.values_list('step', flat=True))))
+
+    def grade(self, count: int, result: str):
+        for memory_id in self.memories.order_by('pk').values_list('pk', flat=True)[:count]:
+            grade_memory(memory_id, result, self.now)
+
+    def test_sync(self):
+        Word.objects.create(book=self.book, word='more', meaning='more')
+        self.assertEqual(sync_memories(self.user, self.book, MemoryTypes.Word), 1)
+        self.assertCounted(self.now)
+
+    def test_grade(self):
+        self.grade(10, MemoryStatus.Aware)
+        self.grade(3, MemoryStatus.Forgot)
+        self.assertCounted(self.now)
+        self.assertCounted(self.now + timedelta(seconds=1))
+
+    def test_hour_fold(self):
+        self.grade(10, MemoryStatus.Aware)
+        # 지나간 시간대의 버킷을 due_cnt로 합친다
+        for hours in (1, 17, 24 * 2, 24 * 10):
+            self.assertCounted(self.now + timedelta(hours=hours))
+        self.assertFalse(UnlockBucket.objects.filter(bucket_dt__lt=self.now + timedelta(hours=24 * 9)).exists())
+
+    def test_delete(self):
+        self.grade(10, MemoryStatus.Aware)
+        graded = self.memories.filter(step__gt=0).order_by('pk')
+        graded.first().delete()
+        Memory.objects.filter(pk__in=list(graded.values_list('pk', flat=True)[:2])).delete()
+        # 단어를 지우면 Memory도 같이 지워진다
+        Word.objects.filter(pk__in=list(self.memories.filter(step=0).values_list('word_id', flat=True)[:3])).delete()
+        self.assertEqual(self.memories.count(), WORD_COUNT - 6)
+        self.assertCounted(self.now)
+        self.assertCounted(self.now + timedelta(days=2))
+
+    def test_delete_book(self):
+        self.grade(10, MemoryStatus.Aware)
+        Book.objects.filter(pk=self.book.pk).delete()
+        # 같이 지워지는 카운터에 남는 행이 없다
+        for model in (DueCounter, UnlockBucket, StepCounter):
+            self.assertFalse(model.objects.filter(book_id=self.book.pk).exists())
+
+    def test_admin_change(self):
+        model_admin = admin.site._registry[Memory]
+        memory = self.memories.order_by('pk').first()
+        memory.unlock_dt = self.now + timedelta(hours=3)
+        memory.step = 2
+        model_admin.save_model(None, memory, None, True)
+
+        memory = self.memories.order_by('pk').last()
+        memory.type = MemoryTypes.Meaning
+        model_admin.save_model(None, memory, None, True)
+
+        self.assertCounted(self.now)
+        self.assertCounted(self.now + timedelta(hours=4))
@@ -0,0 +1,56 @@
+import io
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from exams.benchmarks import seed_user
+from exams.grading import BULK_UPDATE_SIZE
+from exams.importer import import_words
+from exams.models import Book, Word
+from exams.search import search_words
+
+WORD_COUNT = 120
+
+
+def get_csv(rows: list) -> io.StringIO:
+    lines = ['word,pronunciation,meaning,naver_link,related']
+    lines += ['%s,,%s,,%s' % row for row in rows]
+    return io.StringIO('\n'.join(lines) + '\n')
+
+
+class ImportWordsTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title='importer', owner=seed_user('importer'))
+        # word-0은 word-1과 관련어로 잇는다
+        rows = [('word-%d' % i, 'meaning-%d' % i, 'word-1' if i == 0 else '') for i in range(WORD_COUNT)]
+        stats = import_words(self.book, get_csv(rows), 'csv')
+        self.assertEqual(stats['created'], WORD_COUNT)
+
+    def test_reimport_changed_words(self):
+        before = dict(Word.objects.values_list('word', 'modify_dt'))
+        # 관련어 카드를 다시 만드는지 보려고 손대지 않는 단어의 카드는 표시해 둔다
+        Word.objects.filter(word__in=['word-0', 'word-2']).update(card_html='stale')
+
+        rows = [('word-%d' % i, 'changed-%d' % i if i % 2 else 'meaning-%d' % i, 'word-1' if i == 0 else '')
+                for i in range(WORD_COUNT)]
+        with CaptureQueriesContext(connection) as context:
+            stats = import_words(self.book, get_csv(rows), 'csv')
+        self.assertEqual((stats['created'], stats['updated']), (0, WORD_COUNT // 2))
+
+        # 고친 단어는 chunk마다 UPDATE 한번으로 쓴다
+        updates = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE "exams_word" SET "modify_dt"')]
+        self.assertEqual(len(updates), -(-(WORD_COUNT // 2) // BULK_UPDATE_SIZE))
+
+        words = dict((word.word, word) for word in Word.objects.all())
+        self.assertEqual(words['word-1'].meaning, 'changed-1')
+        self.assertGreater(words['word-1'].modify_dt, before['word-1'])
+        self.assertEqual(words['word-2'].modify_dt, before['word-2'])
+
+        # 관련어가 바뀐 word-0의 카드만 다시 만들고, 바뀌지 않은 word-2는 그대로 둔다
+        self.assertIn('changed-1', words['word-0'].card_html)
+        self.assertEqual(words['word-2'].card_html, 'stale')
+        # 검색 색인도 고친 뜻으로 찾는다
+        self.assertIn('word-3', search_words(Word.objects.all(), 'changed-3').values_list('word', flat=True))
+        self.assertNotIn('word-3', search_words(Word.objects.all(), 'meaning-3').values_list('word', flat=True))
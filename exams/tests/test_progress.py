@@ -0,0 +1,76 @@
+import io
+import os
+import random
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from exams.grading import grade_memory
+from exams.models import Book, Memory, MemoryStatus, MemoryTypes, Statistics, User, Word
+from exams.progress import MEMORY_FIELDS, STATISTICS_FIELDS
+from exams.sync import sync_memories
+
+WORD_COUNT = 40
+
+
+def get_memories(user: User) -> dict:
+    return dict(((book, word, exam_type), rest) for book, word, exam_type, *rest in
+                Memory.objects.filter(user=user).values_list('book__title', 'word__word', *MEMORY_FIELDS))
+
+
+def get_statistics(user: User) -> set:
+    return set(Statistics.objects.filter(user=user).values_list('book__title', *STATISTICS_FIELDS))
+
+
+class ProgressRoundTripTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name='progress')
+        self.book = self.create_book(range(WORD_COUNT))
+        for exam_type in (MemoryTypes.Word, MemoryTypes.Meaning):
+            sync_memories(self.user, self.book, exam_type)
+
+        rng = random.Random(0)
+        now = timezone.now()
+        for memory_id in Memory.objects.filter(user=self.user).values_list('pk', flat=True):
+            for _ in range(rng.randrange(4)):
+                grade_memory(memory_id, rng.choice((MemoryStatus.Aware, MemoryStatus.Forgot)),
+                             now - timedelta(days=rng.randrange(10)))
+
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl.gz')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def create_book(self, numbers) -> Book:
+        book = Book.objects.create(title='progress', owner=self.user)
+        Word.objects.bulk_create([Word(book=book, word='word-%d' % i, meaning='meaning') for i in numbers])
+        return book
+
+    def test_round_trip(self):
+        memories = get_memories(self.user)
+        statistics = get_statistics(self.user)
+        self.assertTrue(statistics)
+        call_command('export_progress', self.user.name, self.path, stdout=io.StringIO())
+
+        # 책과 단어를 다른 순서로 다시 만들어서 id를 모두 바꾼다
+        word_ids = set(Word.objects.filter(book=self.book).values_list('pk', flat=True))
+        self.book.delete()
+        self.create_book(reversed(range(WORD_COUNT)))
+        self.assertFalse(word_ids & set(Word.objects.values_list('pk', flat=True)))
+
+        # 여러 묶음으로 나눠 읽도록 묶음 크기를 줄인다
+        with mock.patch('exams.progress.PROGRESS_BATCH_SIZE', 7):
+            call_command('import_progress', self.user.name, self.path, stdout=io.StringIO())
+        self.assertEqual(get_memories(self.user), memories)
+        self.assertEqual(get_statistics(self.user), statistics)
+
+        # 이미 있는 행은 덮어쓴다
+        Memory.objects.filter(user=self.user).update(step=99)
+        Statistics.objects.filter(user=self.user).update(aware_cnt=99, forgot_cnt=99)
+        with mock.patch('exams.progress.PROGRESS_BATCH_SIZE', 7):
+            call_command('import_progress', self.user.name, self.path, stdout=io.StringIO())
+        self.assertEqual(get_memories(self.user), memories)
+        self.assertEqual(get_statistics(self.user), statistics)
@@ -0,0 +1,149 @@
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.models import User as AuthUser
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from exams.benchmarks import seed_book
+from exams.counters import increase_statistics
+from exams.dashboard import get_dashboard
+from exams.deck import get_deck, get_random_memory
+from exams.duecount import get_due_count
+from exams.grading import get_statistics_key, grade_memory
+from exams.models import Memory, MemoryStatus, MemoryTypes, Statistics, User, Word
+from exams.sync import get_unsynced_word_ids, process_pending, sync_memories
+
+# 이 문구가 들어간 단계가 있으면 실패로 본다
+FULL_SCAN = 'SCAN '
+TEMP_SORT = 'USE TEMP B-TREE'
+
+# 한 행만 읽는 단계와, LIMIT으로 잘라 센 서브쿼리 결과를 읽는 단계는 SCAN으로 나와도 괜찮다
+ALLOWED_SCANS = ('SCAN CONSTANT ROW', 'SCAN subquery')
+
+# LIMIT이 있으면 인덱스 순서대로 읽다가 멈추므로 인덱스 SCAN은 괜찮다
+INDEX_SCAN = ' USING '
+
+# 채점과 시험 화면에서 읽고 쓰는 테이블
+HOT_TABLES = ('exams_memory', 'exams_statistics', 'exams_statisticsrollup', 'exams_duecounter',
+              'exams_unlockbucket', 'exams_stepcounter')
+
+
+def explain(sql: str) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def get_problems(plan: list, limited: bool) -> list:
+    problems = []
+    for step in plan:
+        if TEMP_SORT in step:
+            problems.append(step)
+        elif step.startswith(FULL_SCAN) and not step.startswith(ALLOWED_SCANS) and \
+                not (limited and INDEX_SCAN in step):
+            problems.append(step)
+    return problems
+
+
+class QueryPlanTest(TestCase):
+    # 실제 코드가 실행한 쿼리를 모아서 실행 계획을 본다
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superuser = AuthUser.objects.create_superuser('query-plans', '', 'password')
+        owner = User.objects.create(name='query-plans-owner')
+        cls.book = seed_book(owner, 'query-plans', 300)
+        # 선택지가 하나뿐인 목록 필터는 admin이 쓰지 않는다
+        seed_book(owner, 'query-plans-other', 10)
+        for i in range(3):
+            user = User.objects.create(name='query-plans-%d' % i)
+            sync_memories(user, cls.book, MemoryTypes.Word)
+        cls.user = User.objects.get(name='query-plans-0')
+
+        now = timezone.now()
+        rng = random.Random(0)
+        memory_ids = list(Memory.objects.values_list('pk', flat=True))
+        for memory_id in rng.sample(memory_ids, 300):
+            grade_memory(memory_id, rng.choice((MemoryStatus.Aware, MemoryStatus.Forgot)),
+                         now - timedelta(days=rng.randrange(30)))
+
+    def capture(self, func, *args, **kwargs) -> list:
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return [query['sql'] for query in context.captured_queries]
+
+    def assertPlans(self, queries: list, tables: tuple = HOT_TABLES):
+        checked = 0
+        for sql in queries:
+            if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')) or \
+                    not any('"%s"' % table in sql for table in tables):
+                continue
+            plan = explain(sql)
+            problems = get_problems(plan, ' LIMIT ' in sql)
+            self.assertEqual(problems, [], '%s\n    %s' % (sql, '\n    '.join(plan)))
+            checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_random_memory(self):
+        self.assertPlans(self.capture(get_random_memory, self.user, self.book, MemoryTypes.Word))
+
+    def test_deck(self):
+        self.assertPlans(self.capture(get_deck, self.user, self.book, MemoryTypes.Word, 20))
+
+    def test_remain_count(self):
+        key = (self.user.pk, self.book.pk, MemoryTypes.Word)
+        now = timezone.now()
+        # 이번 시간대에 풀린 카드만 세는 경우와, 카운터보다 앞선 시각이라 직접 세는 경우
+        self.assertPlans(self.capture(get_due_count, key, now))
+        self.assertPlans(self.capture(get_due_count, key, now - timedelta(hours=2)))
+
+    def test_sync(self):
+        self.assertPlans(self.capture(get_unsynced_word_ids, self.user, self.book, MemoryTypes.Word))
+
+    def test_pending_sync(self):
+        Word.objects.create(book=self.book, word='query-plans-new', meaning='new')
+        self.assertPlans(self.capture(process_pending, self.book))
+
+    def test_grade(self):
+        memory_id = Memory.objects.filter(user=self.user).values_list('pk', flat=True)[0]
+        self.assertPlans(self.capture(grade_memory, memory_id, MemoryStatus.Aware))
+        self.assertPlans(self.capture(grade_memory, memory_id, MemoryStatus.Forgot))
+
+    def test_statistics_upsert(self):
+        memory = Memory.objects.filter(user=self.user).first()
+        key = get_statistics_key(memory, timezone.now())
+        self.assertPlans(self.capture(increase_statistics, Counter([key]), Counter()))
+
+    def test_dashboard(self):
+        # 카운터가 없을 때 처음 한번만 전체를 세므로 두번째 요청을 본다
+        get_dashboard(self.user, self.book, MemoryTypes.Word)
+        self.assertPlans(self.capture(get_dashboard, self.user, self.book, MemoryTypes.Word))
+
+    def get_changelist_queries(self, url: str, params: dict = None) -> list:
+        self.client.force_login(self.superuser)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_statistics_admin(self):
+        self.assertPlans(self.get_changelist_queries('/admin/exams/statistics/'), ('exams_statistics', ))
+        self.assertPlans(self.get_changelist_queries('/admin/exams/statistics/', {'user__id__exact': self.user.pk}),
+                         ('exams_statistics', ))
+        # 뒤쪽 페이지도 인덱스에서 커서 위치부터 읽는다
+        after = Statistics.objects.order_by('user', 'book', '-exam_date', 'type', 'step', 'status')[40]
+        self.assertPlans(self.get_changelist_queries('/admin/exams/statistics/', {'after': after.pk}),
+                         ('exams_statistics', ))
+
+    def test_memory_admin(self):
+        self.assertPlans(self.get_changelist_queries('/admin/exams/memory/'), ('exams_memory', ))
+
+    def test_word_admin(self):
+        queries = self.get_changelist_queries('/admin/exams/word/', {'book__id__exact': self.book.pk})
+        # 필터 옆에 보여주는 전체 단어 수는 admin이 항상 센다
+        self.assertPlans([sql for sql in queries if sql != 'SELECT COUNT(*) AS "__count" FROM "exams_word"'],
+                         ('exams_word', ))
@@ -0,0 +1,99 @@
+import io
+import json
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from exams.benchmarks import seed_book, seed_due_memories, seed_user
+from exams.models import Book, Memory, MemoryTypes, SchedulerTypes
+from exams.scheduler import spread_due
+
+DUE_COUNT = 1000
+
+
+class SpreadDueTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('spread-due')
+        cls.book = seed_book(cls.user, 'spread-due', DUE_COUNT)
+        seed_due_memories(cls.user, cls.book, MemoryTypes.Word)
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.memories = Memory.objects.filter(user=self.user, book=self.book, type=MemoryTypes.Word)
+        # 절반은 같은 시각에 풀려서 pk로만 순서가 갈린다
+        half = self.memories.order_by('pk').values_list('pk', flat=True)[DUE_COUNT // 2]
+        self.memories.filter(pk__lt=half).update(unlock_dt=self.now - timedelta(days=3))
+        self.memories.filter(pk__gte=half).update(unlock_dt=self.now - timedelta(hours=1))
+
+    def test_spread_with_cap(self):
+        expected = list(self.memories.order_by('group_level', 'unlock_dt', 'pk').values_list('pk', flat=True))
+        before = dict(self.memories.values_list('pk', 'unlock_dt'))
+        with mock.patch('exams.scheduler.RESCHEDULE_BATCH_SIZE', 64):
+            moved, left = spread_due(self.memories, self.now, 7, 100)
+        self.assertEqual((moved, left), (600, DUE_COUNT - 700))
+
+        unlock_dts = dict(self.memories.values_list('pk', 'unlock_dt'))
+        days = [(unlock_dts[pk] - self.now).days if unlock_dts[pk] > self.now else 0 for pk in expected[:700]]
+        # 오래 기다린 카드부터 하루에 100개씩 7일 동안
+        self.assertEqual(days, sorted(days))
+        self.assertEqual(Counter(days), {day: 100 for day in range(7)})
+        # 7일에 들어가지 않는 카드는 그대로 둔다
+        self.assertEqual([unlock_dts[pk] for pk in expected[700:]], [before[pk] for pk in expected[700:]])
+
+    def test_spread_within_days(self):
+        with mock.patch('exams.scheduler.RESCHEDULE_BATCH_SIZE', 64):
+            moved, left = spread_due(self.memories, self.now, 10, 500)
+        self.assertEqual((moved, left), (DUE_COUNT - 100, 0))
+        self.assertEqual(self.memories.filter(unlock_dt__lte=self.now).count(), 100)
+        self.assertEqual(self.memories.filter(unlock_dt__gt=self.now + timedelta(days=10)).count(), 0)
+
+    def test_command_reports_left(self):
+        stdout = io.StringIO()
+        call_command('spread_due', str(self.user.pk), str(self.book.pk), '--days', '3', '--cap', '200',
+                     stdout=stdout)
+        self.assertIn('400 cards moved', stdout.getvalue())
+        self.assertIn('400 cards did not fit in 3 days at 200 a day', stdout.getvalue())
+
+    def test_invalid_cap(self):
+        with self.assertRaises(ValueError):
+            spread_due(self.memories, self.now, 7, 0)
+        with self.assertRaises(CommandError):
+            call_command('spread_due', str(self.user.pk), str(self.book.pk), '--cap', '0')
+        self.assertEqual(self.memories.filter(unlock_dt__gt=self.now).count(), 0)
+
+
+class SchedulerParamsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = seed_user('scheduler-params')
+
+    def get_book(self, scheduler: str, params) -> Book:
+        return Book(title='scheduler-params', owner=self.owner, scheduler=scheduler,
+                    scheduler_params=json.dumps(params))
+
+    def test_valid(self):
+        for scheduler, params in ((SchedulerTypes.Leitner, {}),
+                                  (SchedulerTypes.Leitner, {'intervals': [1, 2.5, 10], 'offset_hours': 0}),
+                                  (SchedulerTypes.SM2, {'ease': 2, 'min_ease': 1.5, 'first_intervals': [1]})):
+            self.get_book(scheduler, params).full_clean()
+
+    def test_invalid(self):
+        for scheduler, params in ((SchedulerTypes.Leitner, {'interval': [1]}),
+                                  (SchedulerTypes.Leitner, {'intervals': '7'}),
+                                  (SchedulerTypes.Leitner, {'intervals': []}),
+                                  (SchedulerTypes.Leitner, {'intervals': [1, -7]}),
+                                  (SchedulerTypes.Leitner, {'intervals': [1e12]}),
+                                  (SchedulerTypes.Leitner, {'relearn_hours': True}),
+                                  (SchedulerTypes.SM2, {'ease': -2.5}),
+                                  (SchedulerTypes.SM2, {'ease': '2.5'}),
+                                  (SchedulerTypes.SM2, {'ease': 1.1}),
+                                  (SchedulerTypes.SM2, {'max_interval': 10 ** 9, 'ease': 100})):
+            with self.assertRaises(ValidationError, msg=params) as context:
+                self.get_book(scheduler, params).full_clean()
+            self.assertIn('scheduler_params', context.exception.message_dict)
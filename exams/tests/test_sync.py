@@ -0,0 +1,60 @@
+import threading
+
+from django.contrib.auth.models import User as AuthUser
+from django.db import connection
+from django.test import Client, TransactionTestCase, override_settings
+
+from exams.benchmarks import seed_book
+from exams.duecount import get_due_count
+from exams.models import DueCounter, Memory, MemoryTypes, User
+
+THREADS = 8
+WORD_COUNT = 200
+
+
+class ConcurrentFirstSyncTest(TransactionTestCase):
+    def setUp(self):
+        self.auth_user = AuthUser.objects.create_user('first-sync')
+        self.user = User.objects.create(name='first-sync', auth_user=self.auth_user)
+        self.book = seed_book(self.user, 'first-sync', WORD_COUNT)
+
+    def open_exam(self) -> list:
+        # 모든 스레드가 처음 공부하는 책의 시험 화면을 동시에 연다
+        barrier = threading.Barrier(THREADS)
+        status_codes = []
+        errors = []
+
+        def run():
+            client = Client()
+            client.force_login(self.auth_user)
+            try:
+                barrier.wait()
+                status_codes.append(client.get('/exams/%d/%s/' % (self.book.pk, MemoryTypes.Word)).status_code)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return status_codes
+
+    def assertSynced(self):
+        memories = Memory.objects.filter(user=self.user, book=self.book, type=MemoryTypes.Word)
+        self.assertEqual(memories.count(), WORD_COUNT)
+        self.assertEqual(DueCounter.objects.count(), 1)
+        key = (self.user.pk, self.book.pk, MemoryTypes.Word)
+        self.assertEqual(get_due_count(key), WORD_COUNT)
+
+    def test_write_queue(self):
+        self.assertEqual(self.open_exam(), [200] * THREADS)
+        self.assertSynced()
+
+    @override_settings(SQLITE_WRITE_QUEUE=False)
+    def test_without_write_queue(self):
+        self.assertEqual(self.open_exam(), [200] * THREADS)
+        self.assertSynced()
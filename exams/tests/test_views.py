@@ -0,0 +1,139 @@
+import json
+
+from django.contrib.auth.models import User as AuthUser
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from exams.benchmarks import seed_book
+from exams.cards import rebuild_cards
+from exams.models import Book, Memory, MemoryStatus, MemoryTypes, User, Word
+from exams.search import index_book
+
+
+class ExamViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        auth_user = AuthUser.objects.create_user('exam', password='password')
+        owner = User.objects.create(name='exam', auth_user=auth_user)
+        # 시험 볼 책에는 관련어가 달린 단어 하나만 둔다
+        cls.book = Book.objects.create(title='exam', owner=owner)
+        terms_book = Book.objects.create(title='exam-terms', owner=owner)
+        cls.word = Word.objects.create(book=cls.book, word='word', meaning='meaning', naver_link='1')
+        for field in ('related', 'synonym', 'antonym'):
+            for i in range(3):
+                term = Word.objects.create(book=terms_book, word='%s-%d' % (field, i), meaning='meaning',
+                                           naver_link='%s%d' % (field, i))
+                getattr(cls.word, field).add(term)
+        # 관련어가 바뀐 카드는 커밋된 후에 다시 만들어지는데 TestCase는 커밋하지 않는다
+        rebuild_cards([cls.word.pk])
+
+    def setUp(self):
+        self.client.login(username='exam', password='password')
+        # 처음 공부하는 책을 동기화하고 남은 카드 카운터를 만든다
+        self.client.get('/exams/%d/%s/' % (self.book.pk, MemoryTypes.Word))
+
+    def test_exam_query_count(self):
+        # 세션, auth user, 책, 가장 낮은 버킷, 버킷 안의 카드, 카드와 단어,
+        # 남은 카드 수(카운터, 지나간 버킷, 이번 시간대에 풀린 카드). 관련어는 card_html에 들어 있다
+        with self.assertNumQueries(9):
+            response = self.client.get('/exams/%d/%s/' % (self.book.pk, MemoryTypes.Word))
+        for label in ('[관]', '[유]', '[반]'):
+            self.assertContains(response, label)
+        self.assertContains(response, 'antonym-2(meaning)')
+
+    def test_unbuilt_card_is_read_only(self):
+        Word.objects.filter(pk=self.word.pk).update(card_html='')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/exams/%d/%s/' % (self.book.pk, MemoryTypes.Word))
+        self.assertContains(response, 'antonym-2(meaning)')
+        # GET 요청에서는 카드를 저장하지 않는다
+        self.assertEqual([query['sql'] for query in context.captured_queries
+                          if not query['sql'].startswith('SELECT')], [])
+        self.assertEqual(Word.objects.get(pk=self.word.pk).card_html, '')
+
+
+class DeckCardsViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        auth_user = AuthUser.objects.create_user('deck', password='password')
+        cls.book = seed_book(User.objects.create(name='deck', auth_user=auth_user), 'deck', 5)
+
+    def setUp(self):
+        self.client.login(username='deck', password='password')
+
+    def get_cards(self, size: str) -> list:
+        response = self.client.get('/exams/%d/%s/deck/cards' % (self.book.pk, MemoryTypes.Word), {'size': size})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['cards']
+
+    def test_size(self):
+        self.assertEqual(len(self.get_cards('3')), 3)
+        # 1장보다 작으면 1장, 책보다 크면 있는 만큼 준다
+        self.assertEqual(len(self.get_cards('-3')), 1)
+        self.assertEqual(len(self.get_cards('0')), 1)
+        self.assertEqual(len(self.get_cards('1000')), 5)
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        AuthUser.objects.create_user('search', password='password')
+        index_book(seed_book(User.objects.create(name='search'), 'search', 5))
+
+    def test_login_required(self):
+        response = self.client.get('/exams/search', {'q': 'search'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_limit(self):
+        self.client.login(username='search', password='password')
+        for limit, count in (('2', 2), ('-5', 1), ('0', 1), ('1000', 5)):
+            response = self.client.get('/exams/search', {'q': 'search', 'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['words']), count, limit)
+
+
+class GradeViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        auth_user = AuthUser.objects.create_user('grade', password='password')
+        user = User.objects.create(name='grade', auth_user=auth_user)
+        other = User.objects.create(name='grade-other')
+        book = Book.objects.create(title='grade', owner=user)
+        word = Word.objects.create(book=book, word='word', meaning='meaning')
+        cls.memory = Memory.objects.create(user=user, book=book, word=word, type=MemoryTypes.Word)
+        cls.other_memory = Memory.objects.create(user=other, book=book, word=word, type=MemoryTypes.Word)
+
+    def setUp(self):
+        self.client.login(username='grade', password='password')
+
+    def post(self, body):
+        return self.client.post('/exams/grade', json.dumps(body), content_type='application/json')
+
+    def get_event(self, event_id: str, memory: Memory) -> dict:
+        return {'id': event_id, 'memory_id': memory.pk, 'result': MemoryStatus.Aware}
+
+    def test_invalid_events(self):
+        for body in ({'events': [1]}, {'events': ['event']}, {'events': 1}, {},
+                     {'events': [dict(self.get_event('1', self.memory), id=1)]}):
+            self.assertEqual(self.post(body).status_code, 400, body)
+
+    def test_counts(self):
+        response = self.post({'events': [self.get_event('1', self.memory), self.get_event('1', self.memory),
+                                         self.get_event('2', self.other_memory)]})
+        self.assertEqual(response.json(), {'applied': 1, 'duplicated': 1, 'rejected': 1})
+
+        response = self.post({'events': [self.get_event('1', self.memory)]})
+        self.assertEqual(response.json(), {'applied': 0, 'duplicated': 1, 'rejected': 0})
+
+
+class MetricsViewTest(TestCase):
+    def test_access(self):
+        # 테스트 클라이언트는 127.0.0.1에서 요청한다
+        self.assertEqual(self.client.get('/exams/metrics').status_code, 403)
+        with self.settings(METRICS_ALLOW_INTERNAL_IPS=True):
+            self.assertEqual(self.client.get('/exams/metrics').status_code, 200)
+
+        AuthUser.objects.create_user('staff', password='password', is_staff=True)
+        self.client.login(username='staff', password='password')
+        self.assertEqual(self.client.get('/exams/metrics').status_code, 200)
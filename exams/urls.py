@@ -7,4 +7,10 @@ urlpatterns = [
     url(r'^(?P<book_id>[0-9]+)/(?P<exam_type>[wm])/$', views.exam, name='exam'),
     url(r'^aware/(?P<memory_id>[0-9]+)$', views.aware, name='aware'),
     url(r'^forgot/(?P<memory_id>[0-9]+)$', views.forgot, name='forgot'),
+    url(r'^(?P<book_id>[0-9]+)/(?P<exam_type>[wm])/deck/$', views.deck, name='deck'),
+    url(r'^(?P<book_id>[0-9]+)/(?P<exam_type>[wm])/deck/cards$', views.deck_cards, name='deck_cards'),
+    url(r'^(?P<book_id>[0-9]+)/(?P<exam_type>[wm])/dashboard/$', views.dashboard, name='dashboard'),
+    url(r'^grade$', views.grade, name='grade'),
+    url(r'^search$', views.search, name='search'),
+    url(r'^metrics$', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,40 @@
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest
+
+from exams.models import User
+
+SESSION_KEY = '_exams_user_id'
+
+
+def __get_or_create_user(auth_user) -> User:
+    user = User.objects.filter(auth_user=auth_user).first()
+    if user is not None:
+        return user
+
+    # 같은 이름으로 먼저 만들어진 학습자가 있다면 그 학습자와 연결한다
+    name = auth_user.get_username()
+    if User.objects.filter(name=name, auth_user=None).update(auth_user=auth_user):
+        return User.objects.get(auth_user=auth_user)
+
+    try:
+        with transaction.atomic():
+            return User.objects.create(name=name, auth_user=auth_user)
+    except IntegrityError:
+        user = User.objects.filter(auth_user=auth_user).first()
+        if user is not None:
+            # 다른 요청이 먼저 만들었다
+            return user
+
+    # 이름이 다른 계정의 학습자와 겹친다
+    return User.objects.create(name='%s#%d' % (name[:20], auth_user.pk), auth_user=auth_user)
+
+
+def get_request_user(request: HttpRequest) -> User:
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None:
+        user = __get_or_create_user(request.user)
+        request.session[SESSION_KEY] = user.pk
+        return user
+
+    # 세션에 저장된 id만으로 만든다. 조회용 쿼리는 모두 user_id만 쓴다
+    return User(pk=user_id)
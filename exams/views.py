@@ -1,151 +1,197 @@
-from datetime import timedelta, datetime
+import json
+from datetime import datetime
 
-from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse, HttpRequest, Http404
+from django.conf import settings
+from django.http import HttpResponse, HttpRequest, Http404, HttpResponseBadRequest, HttpResponseForbidden, \
+    JsonResponse
+from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_POST
 
-from exams.models import Book, Memory, User, MemoryTypes, Word, MemoryStatus, Statistics
+from exams.models import Book, Memory, MemoryStatus, Word
+from exams.cards import get_card_html
+from exams.dashboard import get_dashboard
+from exams.deck import get_deck, get_question_answer, get_random_memory, get_remain_count
+from exams.grading import grade_events, grade_memory
+from exams.metrics import get_snapshot
+from exams.search import search_words
+from exams.sync import get_unsynced_word_ids, process_pending, sync_memories
+from exams.users import get_request_user
+from exams.writer import write
 
 
-def index(request: HttpRequest) -> HttpResponse:
-    print(request)
-    return HttpResponse("Hello, world")
-
-
-def __get_user() -> User:
-    return User.objects.get(pk=1)
-
-
-def __sync_memories(user: User, book: Book, exam_type: str):
-    memories = book.memory_set.filter(user=user, type=exam_type).order_by('-create_dt')[:1]
+DECK_SIZE = 20
+MAX_DECK_SIZE = 100
+MAX_GRADE_EVENTS = 500
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
 
-    if len(memories) <= 0:
-        words_to_add = book.word_set.filter()
-    else:
-        words_to_add = book.word_set.filter(create_dt__gt=memories[0].create_dt)
 
-    for word in words_to_add:   # type: Word
-        assert isinstance(word, Word)
-        memory = Memory()
-        memory.user = user
-        memory.word = word
-        memory.book = book
-        memory.type = exam_type
-        memory.save()
-
-
-def __get_random_memory(user: User, book: Book, exam_type: str) -> Word:
-    # return Memory.objects.get(pk=819)
-    memories = Memory.objects.filter(user=user, book=book, type=exam_type, unlock_dt__lte=timezone.now()) \
-                     .order_by('group_level', '?')[:1]
-    if len(memories) <= 0:
-        return None
-    else:
-        return memories[0]
-
-
-def __get_remain_count(user: User, book: Book, exam_type: str) -> int:
-    return Memory.objects.filter(user=user, book=book, type=exam_type, unlock_dt__lte=timezone.now()).count()
+def index(request: HttpRequest) -> HttpResponse:
+    return HttpResponse("Hello, world")
 
 
+@login_required
 def exam(request: HttpRequest, book_id: int, exam_type: str) -> HttpResponse:
-    user = __get_user()
+    user = get_request_user(request)
     book = get_object_or_404(Book, pk=book_id)  # type: Book
 
-    __sync_memories(user, book, exam_type)
-    memory = __get_random_memory(user, book, exam_type)
-    remain_count = __get_remain_count(user, book, exam_type)
+    # 새로 추가된 단어가 있을 때만 동기화한다
+    if book.has_pending_words:
+        write(process_pending, book)
+
+    memory = get_random_memory(user, book, exam_type)
+    if memory is None and get_unsynced_word_ids(user, book, exam_type) and \
+            write(sync_memories, user, book, exam_type) > 0:
+        # 처음 공부하는 책이라면 모든 단어를 추가한 후 다시 고른다
+        memory = get_random_memory(user, book, exam_type)
+    remain_count = get_remain_count(user, book, exam_type)
 
     if memory is None:
         return render(request, 'finish.html')
 
-    if exam_type == MemoryTypes.Word:
-        question = memory.word.word     # type: str
-        answer = memory.word.meaning    # type: str
-    elif exam_type == MemoryTypes.Meaning:
-        question = memory.word.meaning  # type: str
-        answer = memory.word.word    # type: str
-    else:
+    try:
+        question, answer = get_question_answer(memory.word, exam_type)
+    except ValueError:
         raise Http404('Invalid Exam-Type.')
 
     context = {
         'memory': memory,
         'question': question,
         'answer': answer,
+        'related_terms': get_card_html(memory.word),
         'remain_count': remain_count,
     }
 
     return render(request, 'exam.html', context)
 
 
-def __get_statistics(memory: Memory) -> Statistics:
+@login_required
+def aware(request: HttpRequest, memory_id: int) -> HttpResponse:
+    # 다른 학습자의 카드는 없는 카드로 본다
+    memory = get_object_or_404(Memory, pk=memory_id, user=get_request_user(request))    # type: Memory
+    write(grade_memory, memory.pk, MemoryStatus.Aware, timezone.now())
+
+    return redirect('exam', book_id=memory.book_id, exam_type=memory.type)
+
+
+@login_required
+def forgot(request: HttpRequest, memory_id: int) -> HttpResponse:
+    memory = get_object_or_404(Memory, pk=memory_id, user=get_request_user(request))    # type: Memory
+    write(grade_memory, memory.pk, MemoryStatus.Forgot, timezone.now())
+
+    return redirect('exam', book_id=memory.book_id, exam_type=memory.type)
+
+
+@login_required
+def deck(request: HttpRequest, book_id: int, exam_type: str) -> HttpResponse:
+    book = get_object_or_404(Book, pk=book_id)  # type: Book
+
+    context = {
+        'book': book,
+        'exam_type': exam_type,
+        'deck_size': DECK_SIZE,
+    }
+
+    return render(request, 'deck.html', context)
+
+
+@login_required
+def dashboard(request: HttpRequest, book_id: int, exam_type: str) -> HttpResponse:
+    user = get_request_user(request)
+    book = get_object_or_404(Book, pk=book_id)  # type: Book
+    context = get_dashboard(user, book, exam_type)
+    context.update(book=book, exam_type=exam_type, rate_tables=[
+        ('Daily', context['daily']), ('Weekly', context['weekly']), ('Monthly', context['monthly'])])
+    return render(request, 'dashboard.html', context)
+
+
+@login_required
+def deck_cards(request: HttpRequest, book_id: int, exam_type: str) -> HttpResponse:
+    user = get_request_user(request)
+    book = get_object_or_404(Book, pk=book_id)  # type: Book
+
     try:
-        return Statistics.objects.get(user=memory.user, book=memory.book, exam_date=timezone.now(),
-                                      type=memory.type, step=memory.step, status=memory.status)
-    except ObjectDoesNotExist:
-        return Statistics(user=memory.user, book=memory.book, exam_date=timezone.now(),
-                          type=memory.type, step=memory.step, status=memory.status)
+        size = max(1, min(int(request.GET.get('size', DECK_SIZE)), MAX_DECK_SIZE))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid deck size.')
 
+    if book.has_pending_words:
+        write(process_pending, book)
 
-def aware(request: HttpRequest, memory_id: int) -> HttpResponse:
-    memory = get_object_or_404(Memory, pk=memory_id)    # type: Memory
-
-    # 첫 테스트에 바로 맞췄다면
-    if memory.group_level <= 0:
-        # 통계 업데이트
-        statistics = __get_statistics(memory)
-        statistics.aware_cnt += 1
-        statistics.save()
-
-        # step을 증가시키고, 그에 맞게 unlock_dt 시각을 변경한다
-        if memory.step == 0:
-            memory.unlock_dt = timezone.now() + timedelta(days=1)
-        elif memory.step == 1:
-            memory.unlock_dt = timezone.now() + timedelta(days=7)
-        elif memory.step == 2:
-            memory.unlock_dt = timezone.now() + timedelta(days=28)
-        elif memory.step == 3:
-            memory.unlock_dt = timezone.now() + timedelta(days=28*3)
-        elif memory.step == 4:
-            memory.unlock_dt = datetime.max()
-        memory.unlock_dt = memory.unlock_dt - timedelta(hours=8)
-        memory.step += 1
-
-        # 한번에 맞췄다면 이 단어는 안다고 볼 수 있다
-        memory.status = MemoryStatus.Aware
-
-        # 한번에 맞췄다는 숫자 표시
-        memory.aware_cnt += 1
-    # 두번째 이후에 맞췄다면
-    else:
-        # 내일 다시 테스트한다
-        memory.unlock_dt = timezone.now() + timedelta(hours=16)
-
-        # 한번이라도 틀리면 스텝0부터 다시 시작한다
-        memory.step = 0
-
-    memory.group_level = 0
-    memory.save()
-
-    return redirect('exam', book_id=memory.book.id, exam_type=memory.type)
+    cards = get_deck(user, book, exam_type, size)
+    if not cards and get_unsynced_word_ids(user, book, exam_type) and \
+            write(sync_memories, user, book, exam_type) > 0:
+        cards = get_deck(user, book, exam_type, size)
 
+    return JsonResponse({
+        'cards': cards,
+        'remain_count': get_remain_count(user, book, exam_type),
+    })
 
-def forgot(request: HttpRequest, memory_id: int) -> HttpResponse:
-    memory = get_object_or_404(Memory, pk=memory_id)    # type: Memory
 
-    # 첫 테스트라면
-    if memory.group_level <= 0:
-        # 통계 업데이트
-        statistics = __get_statistics(memory)
-        statistics.forgot_cnt += 1
-        statistics.save()
+def __parse_grade_event(event: dict, now: datetime) -> dict:
+    if not isinstance(event, dict):
+        raise ValueError('Invalid grade event.')
+
+    answered_at = parse_datetime(event.get('answered_at') or '') or now
+    if timezone.is_naive(answered_at):
+        answered_at = timezone.make_aware(answered_at)
 
-        # 한번에 못 맞췄다는 숫자 표시
-        memory.forgot_cnt += 1
+    if event['result'] not in (MemoryStatus.Aware, MemoryStatus.Forgot) or not isinstance(event['id'], str) or \
+            not 0 < len(event['id']) <= 64:
+        raise ValueError('Invalid grade event.')
+
+    return {
+        'id': event['id'],
+        'memory_id': int(event['memory_id']),
+        'result': event['result'],
+        'answered_at': min(answered_at, now),
+    }
 
-    memory.status = MemoryStatus.Forgot
-    memory.group_level += 1
-    memory.save()
 
-    return redirect('exam', book_id=memory.book.id, exam_type=memory.type)
+@login_required
+@require_POST
+def grade(request: HttpRequest) -> HttpResponse:
+    now = timezone.now()
+    try:
+        events = [__parse_grade_event(event, now)
+                  for event in json.loads(request.body.decode('utf-8'))['events']]
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseBadRequest('Invalid grade events.')
+
+    if len(events) > MAX_GRADE_EVENTS:
+        return HttpResponseBadRequest('Too many grade events.')
+
+    return JsonResponse(write(grade_events, get_request_user(request), events, now))
+
+
+@login_required
+def search(request: HttpRequest) -> HttpResponse:
+    words = Word.objects.all()
+    try:
+        if request.GET.get('book'):
+            words = words.filter(book_id=int(request.GET['book']))
+        limit = max(1, min(int(request.GET.get('limit', SEARCH_LIMIT)), MAX_SEARCH_LIMIT))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid search parameters.')
+
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'words': []})
+
+    words = search_words(words, query).order_by('-pk')[:limit]
+    return JsonResponse({
+        'words': list(words.values('id', 'book_id', 'word', 'pronunciation', 'meaning')),
+    })
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    # 이 프로세스에서 모은 뷰별 히스토그램. staff만 볼 수 있고, 프록시 뒤가 아니라면 로컬 요청도 허용할 수 있다
+    internal = getattr(settings, 'METRICS_ALLOW_INTERNAL_IPS', False) and \
+        request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    if not internal and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return JsonResponse(get_snapshot())
@@ -0,0 +1,134 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+from exams.models import Memory
+
+# 한 트랜잭션으로 묶는 쓰기 수
+GROUP_COMMIT_SIZE = 100
+
+# database is locked가 나면 0.05, 0.1, 0.2 ... 초 쉬고 이만큼 다시 시도한다
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+# 요청 스레드가 쓰기 결과를 기다리는 최대 시간
+WRITE_TIMEOUT = 30
+
+
+def apply_pragmas(db_connection):
+    with db_connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', []):
+            cursor.execute('PRAGMA %s = %s' % (name, value))
+
+
+def lock_for_write():
+    # Django는 deferred BEGIN으로 트랜잭션을 연다. 읽고 나서 쓰기 잠금을 잡으면 그 사이 다른 프로세스가
+    # 커밋했을 때 기다리지 않고 바로 실패하므로, 아무것도 바꾸지 않는 쓰기로 먼저 잠금을 잡는다
+    with connection.cursor() as cursor:
+        cursor.execute('UPDATE %s SET id = id WHERE 0' % Memory._meta.db_table)
+
+
+def is_locked(error: OperationalError) -> bool:
+    message = str(error)
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def retry_locked(func, *args):
+    for attempt in range(BUSY_RETRIES):
+        try:
+            return func(*args)
+        except OperationalError as e:
+            if not is_locked(e):
+                raise
+            time.sleep(BUSY_BACKOFF * 2 ** attempt)
+    return func(*args)
+
+
+class SingleWriter:
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='exams-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args) -> Future:
+        future = Future()
+        self.jobs.put((func, args, future))
+        return future
+
+    def run(self):
+        while True:
+            jobs = [self.jobs.get()]
+            # 앞 트랜잭션이 커밋되는 동안 쌓인 쓰기를 한번에 커밋한다
+            while len(jobs) < GROUP_COMMIT_SIZE:
+                try:
+                    jobs.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                results = retry_locked(self.commit, jobs)
+            except Exception as e:
+                results = [(future, None, e) for _, _, future in jobs]
+            finally:
+                connection.close_if_unusable_or_obsolete()
+
+            for future, result, error in results:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def commit(self, jobs: list) -> list:
+        # 실패한 쓰기는 savepoint만 되돌리고 나머지는 같이 커밋한다.
+        # 잠금 오류는 트랜잭션 전체를 다시 시도하므로 각 쓰기는 DB에서 다시 읽어서 동작해야 한다
+        results = []
+        with transaction.atomic():
+            lock_for_write()
+            for func, args, future in jobs:
+                try:
+                    with transaction.atomic():
+                        results.append((future, func(*args), None))
+                except OperationalError as e:
+                    if is_locked(e):
+                        raise
+                    results.append((future, None, e))
+                except Exception as e:
+                    results.append((future, None, e))
+        return results
+
+
+__writer = None
+__writer_pid = None
+__writer_lock = threading.Lock()
+
+
+def get_writer() -> SingleWriter:
+    global __writer, __writer_pid
+    with __writer_lock:
+        # fork된 워커 프로세스에는 스레드가 따라오지 않으므로 새로 만든다
+        if __writer is None or __writer_pid != os.getpid():
+            __writer = SingleWriter()
+            __writer_pid = os.getpid()
+        return __writer
+
+
+def __write_locked(func, *args):
+    # 읽고 나서 쓰는 작업도 잠금을 먼저 잡으므로 다시 시도할 수 있는 잠금 오류만 난다
+    with transaction.atomic():
+        lock_for_write()
+        return func(*args)
+
+
+def write(func, *args):
+    # SQLite에서는 프로세스마다 한 스레드만 쓰고, 그 사이 쌓인 쓰기를 한 트랜잭션으로 묶는다.
+    # 이미 트랜잭션 안이라면 그 트랜잭션에서 쓴다
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        return func(*args)
+    if not getattr(settings, 'SQLITE_WRITE_QUEUE', False):
+        return retry_locked(__write_locked, func, *args)
+    return get_writer().submit(func, *args).result(WRITE_TIMEOUT)